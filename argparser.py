@@ -1,17 +1,27 @@
 import argparse
-import numpy as np
-import pygame
+from importlib import metadata
 
 DEFAULT_Z = 2
 DEFAULT_N = 100
 DEFAULT_D = "normal"
 NEAT = "neat"
+DEFAULT_CHECKPOINT_EVERY = 10
+DEFAULT_MIGRATE_EVERY = 10
+DEFAULT_MIGRANTS = 2
+
+# versions are read from package metadata
+# so that dependencies are not imported just to print them
+def get_version(package):
+    try:
+        return metadata.version(package)
+    except metadata.PackageNotFoundError:
+        return "not installed"
 
 def get_args():
     prog_desc = "Flappy Bird Clone with NEAT.\n" \
         + "Dependencies tested on:\n" \
-        + "\t numpy {}\n".format(np.__version__) \
-        + "\t pygame {}\n".format(pygame.__version__)
+        + "\t numpy {}\n".format(get_version("numpy")) \
+        + "\t pygame {}\n".format(get_version("pygame"))
     parser = argparse.ArgumentParser(
         description=prog_desc,
         formatter_class=argparse.RawDescriptionHelpFormatter
@@ -45,6 +55,161 @@ def get_args():
         metavar="DIFFICULTY",
         dest="d",
     )
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="run the simulation without a display as fast as possible; " \
+            + "requires an AI to be set",
+    )
+    parser.add_argument(
+        "-g",
+        default=None,
+        type=int,
+        help="number of generations to run before exiting; " \
+            + "only affects headless mode; runs indefinitely if left empty",
+        metavar="GENERATIONS",
+        dest="g",
+    )
+    parser.add_argument(
+        "-j",
+        default=1,
+        type=int,
+        help="number of worker processes used to evaluate each generation; " \
+            + "only affects headless mode; default value is 1",
+        metavar="WORKERS",
+        dest="j",
+    )
+    parser.add_argument(
+        "--listen",
+        default=None,
+        type=str,
+        help="address to hand out generations to workers at, " \
+            + "either host:port or a path for a unix socket; " \
+            + "only affects headless mode and overrides -j",
+        metavar="ADDRESS",
+    )
+    parser.add_argument(
+        "--connect",
+        default=None,
+        type=str,
+        help="run as a worker for a headless run listening at the given " \
+            + "address; settings are taken from that run",
+        metavar="ADDRESS",
+    )
+    parser.add_argument(
+        "--islands",
+        default=None,
+        type=int,
+        help="number of populations of -n genomes to evolve side by side, " \
+            + "each in its own process and on its own courses; " \
+            + "only affects headless mode; not supported with -j or --listen",
+        metavar="ISLANDS",
+    )
+    parser.add_argument(
+        "--migrate-every",
+        default=DEFAULT_MIGRATE_EVERY,
+        type=int,
+        help="number of generations between migrations of the best genomes " \
+            + "from each island to the next; default value is 10",
+        metavar="GENERATIONS",
+    )
+    parser.add_argument(
+        "--migrants",
+        default=DEFAULT_MIGRANTS,
+        type=int,
+        help="number of best genomes sent to the next island " \
+            + "on every migration; default value is 2",
+        metavar="GENOMES",
+    )
+    parser.add_argument(
+        "--record",
+        default=None,
+        type=str,
+        help="directory to record every game to, as jumps of every ball " \
+            + "along with genomes if an AI is set; not supported with -j or --listen",
+        metavar="DIRECTORY",
+    )
+    parser.add_argument(
+        "--replay",
+        default=None,
+        type=str,
+        help="path to a recorded game to watch instead of playing; " \
+            + "settings are taken from the recording",
+        metavar="PATH",
+    )
+    parser.add_argument(
+        "--max-ticks",
+        default=None,
+        type=int,
+        help="number of ticks after which a game is stopped and balls " \
+            + "still alive are scored as they are; unlimited if left empty",
+        metavar="TICKS",
+    )
+    parser.add_argument(
+        "--max-seconds",
+        default=None,
+        type=float,
+        help="wall clock seconds after which a game is stopped and balls " \
+            + "still alive are scored as they are; unlimited if left empty",
+        metavar="SECONDS",
+    )
+    parser.add_argument(
+        "--budget",
+        default=None,
+        type=float,
+        help="wall clock seconds the whole run may take before it stops; " \
+            + "only affects headless mode; unlimited if left empty",
+        metavar="SECONDS",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="time each phase of the main loop; timings are shown " \
+            + "in the information overlay and printed on exit",
+    )
+    parser.add_argument(
+        "--metrics",
+        default=None,
+        type=str,
+        help="path to write per generation metrics to; " \
+            + "written as csv if the path ends with .csv and as jsonl otherwise",
+        metavar="PATH",
+    )
+    parser.add_argument(
+        "--quiet",
+        action="store_true",
+        help="do not print per generation summaries or throughput to stdout",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default=None,
+        type=str,
+        help="path to periodically save the population to; only affects AI mode",
+        metavar="PATH",
+    )
+    parser.add_argument(
+        "--checkpoint-every",
+        default=DEFAULT_CHECKPOINT_EVERY,
+        type=int,
+        help="number of generations between checkpoints; default value is 10",
+        metavar="GENERATIONS",
+    )
+    parser.add_argument(
+        "--resume",
+        default=None,
+        type=str,
+        help="path to a checkpoint to resume the population from; " \
+            + "only affects AI mode; overrides -n",
+        metavar="PATH",
+    )
+    parser.add_argument(
+        "--course",
+        default=None,
+        type=str,
+        help="path to a saved course to fly every game on; " \
+            + "a new random course is used for every game if left empty",
+        metavar="PATH",
+    )
     parser.add_argument(
         "ai",
         nargs="?",
@@ -56,6 +221,18 @@ def get_args():
     )
     args = parser.parse_args()
 
+    if args.headless and args.ai is None:
+        parser.error("headless mode requires an AI to be set")
+    if args.listen is not None and not args.headless:
+        parser.error("--listen requires headless mode")
+    if args.record is not None and (args.j > 1 or args.listen is not None):
+        parser.error("--record only works with a single process")
+    if args.islands is not None:
+        if not args.headless:
+            parser.error("--islands requires headless mode")
+        if args.j > 1 or args.listen is not None or args.record is not None:
+            parser.error("--islands cannot be used with -j, --listen or --record")
+
     # if ai is not given set it to 1
     if args.ai is None:
         args.n = 1
@@ -0,0 +1,259 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import numpy as np
+
+from lib.settings import Settings, DIFFICULTY_SETTINGS
+from lib.objects import Ball
+from lib.environment import Environment
+import neat
+from neat.genome import Genome
+import neatinterface
+import headless
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+DEFAULT_BASELINE = "./benchmarks/baseline.json"
+DEFAULT_THRESHOLD = 0.1
+SEED = 0
+
+ENV_TICKS = 300
+INFERENCE_TICKS = 50
+EVOLVE_GENERATIONS = 5
+END_TO_END_GENERATIONS = 3
+# games are cut off here so that every run does a bounded amount of work
+# no matter how well genomes learn to fly
+END_TO_END_MAX_TICKS = 2000
+POLICY_H_DIMS = [1, 2, 5, 16]
+POLICY_CALLS = 20000
+
+def seed_all(seed=SEED):
+    random.seed(seed)
+    np.random.seed(seed)
+    return
+
+def set_settings(difficulty, n, max_ticks=None):
+    Settings(argparse.Namespace(d=difficulty, n=n, max_ticks=max_ticks))
+    return
+
+def quiet_population(n):
+    population = neat.Population(6, 1, pop_size=n)
+    population.metrics = neat.MetricsLogger(echo=False)
+    return population
+
+# ticks per second of Environment.update with a scripted policy
+# that keeps most balls alive by aiming at the hole of the next wall
+def bench_env_update(n, difficulty):
+    set_settings(difficulty, n)
+    seed_all()
+    env = Environment([Ball() for _ in range(n)], headless=True)
+    offsets = np.random.uniform(-20, 20, n)
+
+    ticks = 0
+    elapsed = 0.0
+    while ticks < ENV_TICKS and not env.game_over():
+        live = env.live
+        env.states.jump(live[env.states.y[live] > env.walls[0].y + offsets[live]])
+        start = time.perf_counter()
+        env.update(None)
+        elapsed += time.perf_counter() - start
+        ticks += 1
+    return ticks / elapsed
+
+# mean latency of one batched forward pass over a whole population
+def bench_inference(n):
+    seed_all()
+    population = quiet_population(n)
+    X = np.random.random((n, population.num_input))
+    idx = np.arange(n)
+    # warm up
+    population.predicts(X, idx)
+
+    start = time.perf_counter()
+    for _ in range(INFERENCE_TICKS):
+        population.predicts(X, idx)
+    return (time.perf_counter() - start) / INFERENCE_TICKS
+
+# mean wall time of Population.evolve_population
+def bench_evolve(n):
+    seed_all()
+    population = quiet_population(n)
+    # warm up
+    population.score_genomes(np.random.randint(1, 1000, n))
+    population.evolve_population()
+
+    elapsed = 0.0
+    for _ in range(EVOLVE_GENERATIONS):
+        population.score_genomes(np.random.randint(1, 1000, n))
+        start = time.perf_counter()
+        population.evolve_population()
+        elapsed += time.perf_counter() - start
+    return elapsed / EVOLVE_GENERATIONS
+
+# mean latency of a single genome prediction, either through Genome.predict
+# or through a policy compiled from the genome, on the same inputs
+def bench_policy(h_dim, compiled):
+    seed_all()
+    genome = Genome(6, 1)
+    genome.w1 = np.random.random((h_dim, genome.x_dim + 1)) * 2 - 1
+    genome.w2 = np.random.random((genome.y_dim, h_dim)) * 2 - 1
+    genome.h_dim = h_dim
+    predict = genome.compile() if compiled else genome.predict
+    x = np.random.random(genome.x_dim)
+    # warm up
+    predict(x)
+
+    start = time.perf_counter()
+    for _ in range(POLICY_CALLS):
+        predict(x)
+    return (time.perf_counter() - start) / POLICY_CALLS
+
+# generations per second of a full headless training run
+def bench_end_to_end(n, difficulty):
+    set_settings(difficulty, n, END_TO_END_MAX_TICKS)
+    seed_all()
+    core = neatinterface.NeatCore(headless=True)
+    core.population.metrics = neat.MetricsLogger(echo=False)
+    runner = headless.HeadlessRunner(core, report=False)
+    return runner.run(END_TO_END_GENERATIONS)["games_per_sec"]
+
+def run(sizes, difficulties):
+    results = {}
+
+    def add(name, value, unit, higher_is_better):
+        results[name] = {
+            "value": value,
+            "unit": unit,
+            "higher_is_better": higher_is_better,
+        }
+        print("{:<36}{:>14.4f} {}".format(name, value, unit))
+        return
+
+    for h_dim in POLICY_H_DIMS:
+        add("predict/{}".format(h_dim), bench_policy(h_dim, False) * 1e6, "us", False)
+        add("compiled/{}".format(h_dim), bench_policy(h_dim, True) * 1e6, "us", False)
+
+    for n in sizes:
+        for difficulty in difficulties:
+            add(
+                "env_update/{}/{}".format(difficulty, n),
+                bench_env_update(n, difficulty),
+                "ticks/s",
+                True
+            )
+        add("inference/{}".format(n), bench_inference(n) * 1000, "ms", False)
+        add("evolve/{}".format(n), bench_evolve(n) * 1000, "ms", False)
+        for difficulty in difficulties:
+            add(
+                "end_to_end/{}/{}".format(difficulty, n),
+                bench_end_to_end(n, difficulty),
+                "generations/s",
+                True
+            )
+    return results
+
+def get_meta():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "seed": SEED,
+    }
+
+# returns names of benchmarks that got worse than the baseline
+# by more than the threshold, as a fraction of the baseline value
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        old = baseline[name]["value"]
+        new = result["value"]
+        if old == 0:
+            continue
+        change = (new - old) / old
+        if not result["higher_is_better"]:
+            change = -change
+        status = "ok"
+        if change < -threshold:
+            status = "REGRESSION"
+            regressions.append(name)
+        print("{:<36}{:>+9.1%}  {}".format(name, change, status))
+    return regressions
+
+def write_json(path, data):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+    return
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        description="Benchmarks for simulation, inference and evolution."
+    )
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        default=DEFAULT_SIZES,
+        type=int,
+        help="population sizes to benchmark; default values are 100 1000 10000 100000",
+    )
+    parser.add_argument(
+        "--difficulties",
+        nargs="+",
+        choices=list(DIFFICULTY_SETTINGS),
+        default=list(DIFFICULTY_SETTINGS),
+        help="difficulty presets to benchmark; default is all of them",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default=None,
+        type=str,
+        help="path to save results to as json",
+    )
+    parser.add_argument(
+        "--baseline",
+        default=DEFAULT_BASELINE,
+        type=str,
+        help="path to baseline results to compare against",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="overwrite the baseline with these results instead of comparing",
+    )
+    parser.add_argument(
+        "--threshold",
+        default=DEFAULT_THRESHOLD,
+        type=float,
+        help="relative slowdown counted as a regression; default value is 0.1",
+    )
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = get_args()
+    data = {
+        "meta": get_meta(),
+        "results": run(args.sizes, args.difficulties),
+    }
+
+    if args.output is not None:
+        write_json(args.output, data)
+
+    if args.save_baseline:
+        write_json(args.baseline, data)
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        print("compared to {}".format(args.baseline))
+        if compare(data["results"], baseline, args.threshold):
+            sys.exit(1)
+    else:
+        print("no baseline found at {}".format(args.baseline))
@@ -0,0 +1,191 @@
+import argparse
+import multiprocessing as mp
+import os
+import random
+import time
+import numpy as np
+import pygame
+
+from lib.settings import Settings, DIFFICULTY_SETTINGS
+from lib.objects import Ball
+from lib.environment import Environment
+from lib.renderer import Renderer
+from lib.course import get_course
+from lib.constants import WIDTH, HEIGHT
+import neat
+import neatinterface
+
+DEFAULT_SEED = 0
+# ten minutes at 60 frames per second
+DEFAULT_MAX_FRAMES = 36000
+FRAME_NAME = "frame_{:06d}.png"
+# outputs with these extensions are written as a single raw rgb stream
+RAW_EXTENSIONS = [".rgb", ".raw"]
+
+settings = Settings()
+
+def is_raw(output):
+    return os.path.splitext(output)[1].lower() in RAW_EXTENSIONS
+
+# plays the champions from the start of the course given by seed;
+# random is seeded as well so that ball colors and the background
+# come out the same in every process
+def new_game(num_balls, seed):
+    random.seed(seed)
+    Environment.reset_background()
+    balls = [Ball() for _ in range(num_balls)]
+    return Environment(balls, course=get_course(seed))
+
+# scores of every genome of a population on the course given by seed
+def get_scores(population, seed):
+    w1, w2 = population.get_weights()
+    return neatinterface.simulate(w1, w2, get_course(seed).offsets)
+
+# frame i shows the game after i ticks, so every frame is a tick apart
+# and a range of frames can be rendered by any process on its own
+# by playing the game from the start without drawing up to the range
+def render_frames(task):
+    w1, w2, seed, start, stop, zoom, output = task
+    sensors = neatinterface.Sensors()
+    env = new_game(len(w1), seed)
+    env.renderer = Renderer(zoom)
+    frame_size = WIDTH * zoom * HEIGHT * zoom * 3
+    fd = os.open(output, os.O_WRONLY) if is_raw(output) else None
+
+    try:
+        for frame in range(stop):
+            if frame >= start:
+                surface = env.get_surface()
+                if fd is not None:
+                    os.pwrite(fd, pygame.image.tobytes(surface, "RGB"), frame * frame_size)
+                else:
+                    pygame.image.save(surface, os.path.join(output, FRAME_NAME.format(frame)))
+            neatinterface.think(env, w1, w2, sensors)
+            env.update(None)
+    finally:
+        if fd is not None:
+            os.close(fd)
+    return stop - start
+
+# renders the run of the best genomes of a population on the course given
+# by seed, sharing frames out in contiguous ranges across worker processes;
+# nothing is ever drawn to a display
+def export(population, output, seed=DEFAULT_SEED, num_balls=1, zoom=1,
+        max_frames=DEFAULT_MAX_FRAMES, num_workers=1):
+    # champions are picked by how far they fly on this very course
+    scores = get_scores(population, seed)
+    best = np.argsort(-scores, kind="stable")[:num_balls]
+    w1, w2 = population.get_weights()
+    w1, w2 = w1[best].copy(), w2[best].copy()
+    # the game lasts until the last champion dies
+    num_frames = min(int(scores[best].max()) + 1, max_frames)
+
+    if is_raw(output):
+        with open(output, "wb") as f:
+            f.truncate(num_frames * WIDTH * zoom * HEIGHT * zoom * 3)
+    else:
+        os.makedirs(output, exist_ok=True)
+
+    bounds = np.linspace(0, num_frames, num_workers + 1, dtype=int)
+    tasks = [
+        (w1, w2, seed, start, stop, zoom, output)
+        for start, stop in zip(bounds[:-1], bounds[1:])
+        if start < stop
+    ]
+    if num_workers > 1:
+        # workers are set up with the same settings, however they are started
+        with mp.Pool(
+            num_workers,
+            initializer=neatinterface.configure,
+            initargs=(settings.get_config(),)
+        ) as pool:
+            pool.map(render_frames, tasks)
+    else:
+        for task in tasks:
+            render_frames(task)
+    return num_frames
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        description="Renders the best genomes of a checkpoint to image files " \
+            + "without a display."
+    )
+    parser.add_argument(
+        "checkpoint",
+        type=str,
+        help="path to a checkpoint saved with --checkpoint",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="frames",
+        type=str,
+        help="directory to save png frames to, or a file ending with " \
+            + ".rgb or .raw to write raw rgb24 frames to; default is frames",
+    )
+    parser.add_argument(
+        "--seed",
+        default=DEFAULT_SEED,
+        type=int,
+        help="seed of the course to fly; default value is 0",
+    )
+    parser.add_argument(
+        "-n",
+        default=1,
+        type=int,
+        help="number of best genomes to render; default value is 1",
+    )
+    parser.add_argument(
+        "-d",
+        choices=list(DIFFICULTY_SETTINGS),
+        default="normal",
+        help="difficulty the checkpoint was trained on; default is normal",
+    )
+    parser.add_argument(
+        "-z",
+        default=1,
+        type=int,
+        help="zoom level of rendered frames; default value is 1",
+    )
+    parser.add_argument(
+        "--max-frames",
+        default=DEFAULT_MAX_FRAMES,
+        type=int,
+        help="number of frames after which the run is cut off; " \
+            + "default value is 36000, which is ten minutes at 60 frames per second",
+    )
+    parser.add_argument(
+        "-j",
+        default=1,
+        type=int,
+        help="number of worker processes to render with; default value is 1",
+    )
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = get_args()
+    population = neat.load_checkpoint(args.checkpoint)
+    Settings(argparse.Namespace(
+        d=args.d,
+        n=args.n,
+        max_ticks=args.max_frames,
+        max_seconds=None
+    ))
+
+    start = time.perf_counter()
+    num_frames = export(
+        population,
+        args.output,
+        seed=args.seed,
+        num_balls=args.n,
+        zoom=args.z,
+        max_frames=args.max_frames,
+        num_workers=args.j
+    )
+    print("exported {} frames of {}x{} to {} in {:.1f}s".format(
+        num_frames,
+        WIDTH * args.z,
+        HEIGHT * args.z,
+        args.output,
+        time.perf_counter() - start
+    ))
@@ -1,41 +1,112 @@
+import atexit
+import sys
+import time
 import pygame
 
 import lib
 from lib.settings import Settings
+from lib.course import Course
 from lib.constants import WIDTH, HEIGHT
 import argparser
 
+import neat
 import neatinterface
+import headless
 
 if __name__ == "__main__":
     args = argparser.get_args()
+    settings = Settings(args)
+
+    if args.connect is not None:
+        headless.work(args.connect)
+        sys.exit()
+
+    profiler = lib.Profiler(enabled=args.profile)
+    if args.profile:
+        atexit.register(profiler.dump)
+
+    if args.ai == "neat":
+        core = neatinterface.NeatCore(headless=args.headless, profiler=profiler)
+        if args.resume is not None:
+            core.population = neat.load_checkpoint(args.resume)
+            settings.num_balls = core.population.pop_size
+        core.population.metrics = neat.MetricsLogger(
+            args.metrics,
+            echo=not args.quiet
+        )
+        if args.checkpoint is not None:
+            core.population.checkpoint = neat.Checkpointer(
+                args.checkpoint,
+                args.checkpoint_every
+            )
+    elif args.replay is not None:
+        core = lib.ReplayCore(lib.Replay(args.replay, headless=False), profiler=profiler)
+    else:
+        core = lib.Core(profiler=profiler)
+    core.record = args.record
+
+    if args.course is not None:
+        core.course = Course.load(args.course)
+
+    if args.headless:
+        runner = headless.get_runner(
+            core,
+            args.j,
+            report=not args.quiet,
+            address=args.listen,
+            num_islands=args.islands,
+            migrate_every=args.migrate_every,
+            num_migrants=args.migrants
+        )
+        runner.run(args.g, args.budget)
+        # the last generation is kept even if it falls between checkpoints
+        if args.checkpoint is not None:
+            neat.save_checkpoint(core.population, args.checkpoint)
+        sys.exit()
 
     # pygame initialization
     pygame.init()
     screen = pygame.display.set_mode((WIDTH * args.z, HEIGHT * args.z))
     clock = pygame.time.Clock()
+    # the scene is composed directly on the display at its resolution
+    core.set_display(screen, args.z)
 
-    settings = Settings(args)
-    if args.ai == "neat":
-        core = neatinterface.NeatCore()
-    else:
-        core = lib.Core()
     core.new_game()
+    # simulated ticks owed to the game but not yet run
+    pending_ticks = 0.0
 
     # main loop
+    # the simulation runs on a fixed timestep decoupled from rendering;
+    # several ticks may be run per rendered frame, and frames are capped
+    # at the display refresh rate regardless of simulation speed
     while True:
-        # set tick rate to 60 per second
-        clock.tick(settings.tickrate)
+        frame_time = clock.tick(settings.framerate) / 1000
+        frame_end = time.perf_counter() + 1 / settings.framerate
+        profiler.start()
+
+        core.handle_events()
+
+        # a tick rate of 0 means as many ticks as fit in a frame
+        if settings.tickrate > 0:
+            pending_ticks += frame_time * settings.tickrate
+        else:
+            pending_ticks = float("inf")
+
+        while pending_ticks >= 1:
+            # update game state
+            core.step()
+            pending_ticks -= 1
 
-        # update game state
-        core.update()
+            if core.game_over():
+                core.new_game()
 
-        if core.game_over():
-            core.new_game()
-            continue
+            # drop ticks that cannot be caught up with
+            # instead of falling further and further behind
+            if time.perf_counter() >= frame_end:
+                pending_ticks = 0.0
 
         # draw screen
-        surface = core.draw()
-        surface = pygame.transform.scale(surface, screen.get_size())
-        screen.blit(surface, surface.get_rect())
-        pygame.display.flip()
+        # only parts that changed are pushed to the display
+        core.draw()
+        pygame.display.update(core.get_dirty_rects())
+        profiler.lap("present")
@@ -0,0 +1,256 @@
+import argparse
+import time
+
+from lib.settings import Settings
+from lib.course import Course
+import argparser
+
+import neat
+import neatinterface
+
+settings = Settings()
+
+# runs the simulation as fast as possible without a display
+# no window is opened, no events are pumped and nothing is rendered
+class HeadlessRunner:
+    def __init__(self, core, report=True):
+        self.core = core
+        self.report = report
+        self.ticks = 0
+        self.games = 0
+        self.elapsed = 0.0
+        # wall clock time at which the run ends, if it is timed
+        self.run_deadline = None
+        return
+
+    # runs until the given number of games is played
+    # or the run is out of time, whichever comes first;
+    # a game still running once time is up is stopped and scored as it is
+    def run(self, num_games=None, max_seconds=None):
+        start = time.perf_counter()
+        if max_seconds is not None:
+            self.run_deadline = time.time() + max_seconds
+        while num_games is None or self.games < num_games:
+            if self.run_deadline is not None and time.time() >= self.run_deadline:
+                break
+            self.run_game()
+            self.elapsed = time.perf_counter() - start
+            if self.report:
+                print(self.get_report())
+        return self.get_stats()
+
+    def run_game(self):
+        core = self.core
+        core.run_deadline = self.run_deadline
+        core.new_game()
+        while True:
+            core.profiler.start()
+            core.update()
+            self.ticks += 1
+            if core.game_over():
+                break
+        self.games += 1
+        return
+
+    def get_stats(self):
+        elapsed = max(self.elapsed, 1e-9)
+        return {
+            "ticks": self.ticks,
+            "games": self.games,
+            "elapsed": self.elapsed,
+            "ticks_per_sec": self.ticks / elapsed,
+            "games_per_sec": self.games / elapsed,
+        }
+
+    def get_report(self):
+        stats = self.get_stats()
+        return "ticks/sec: {:.0f}, generations/sec: {:.2f}".format(
+            stats["ticks_per_sec"],
+            stats["games_per_sec"]
+        )
+
+# same as HeadlessRunner, but each generation is sharded across
+# a pool of worker processes that all fly the same course;
+# the given course is flown by every generation, and each generation
+# gets a new one if left empty
+class ParallelRunner(HeadlessRunner):
+    def __init__(self, population, num_workers, course=None, report=True):
+        super().__init__(None, report=report)
+        self.population = population
+        self.course = course
+        self.evaluator = neat.ParallelEvaluator(
+            neatinterface.simulate,
+            num_workers=num_workers,
+            configure=neatinterface.configure,
+            config=settings.get_config()
+        )
+        return
+
+    def run(self, num_games=None, max_seconds=None):
+        try:
+            return super().run(num_games, max_seconds)
+        finally:
+            self.evaluator.close()
+
+    def run_game(self):
+        course = self.course
+        if course is None:
+            course = Course.generate()
+        scores = self.evaluate(course, settings.get_deadline(self.run_deadline))
+        # the course lasts as long as the best ball does
+        self.ticks += int(scores.max()) + 1
+        self.population.score_genomes(scores)
+        self.population.evolve_population()
+        self.games += 1
+        return
+
+    def evaluate(self, course, deadline):
+        return self.evaluator.evaluate(
+            self.population,
+            course.offsets,
+            deadline=deadline
+        )
+
+# same as ParallelRunner, but shards are sent over sockets to workers
+# connecting to the given address, which may be running on other hosts;
+# workers only need the seed of generated courses to make them on their own
+class DistributedRunner(ParallelRunner):
+    def __init__(self, population, address, course=None, report=True):
+        HeadlessRunner.__init__(self, None, report=report)
+        self.population = population
+        self.course = course
+        self.evaluator = neat.DistributedEvaluator(
+            address,
+            config=settings.get_config()
+        )
+        return
+
+    def evaluate(self, course, deadline):
+        return self.evaluator.evaluate(
+            self.population,
+            course.offsets if course.seed is None else course.seed,
+            deadline=deadline
+        )
+
+# runs several populations side by side in processes of their own
+# with the best genomes migrating between them, see neat.IslandModel;
+# every island flies the given course, and courses of its own if left empty,
+# and population ends up with the best island once the run is over
+class IslandRunner(HeadlessRunner):
+    def __init__(
+        self,
+        population,
+        num_islands,
+        migrate_every=argparser.DEFAULT_MIGRATE_EVERY,
+        num_migrants=argparser.DEFAULT_MIGRANTS,
+        course=None,
+        report=True
+    ):
+        super().__init__(None, report=report)
+        self.population = population
+        self.course = course
+        self.model = neat.IslandModel(
+            num_islands,
+            neatinterface.simulate,
+            neatinterface.get_offsets,
+            get_deadline=neatinterface.get_deadline,
+            configure=neatinterface.configure,
+            config=settings.get_config(),
+            migrate_every=migrate_every,
+            num_migrants=num_migrants
+        )
+        return
+
+    # generations are counted per island
+    def run(self, num_games=None, max_seconds=None):
+        start = time.perf_counter()
+        if max_seconds is not None:
+            self.run_deadline = time.time() + max_seconds
+
+        def report(record):
+            # the course lasts as long as the best ball does
+            self.ticks += record["best_score"] + 1
+            self.games += 1
+            self.elapsed = time.perf_counter() - start
+            self.population.metrics.write(record)
+            if self.report:
+                print("island {}, {}".format(record["island"], self.get_report()))
+            return
+
+        self.model.run(
+            self.population,
+            num_generations=num_games,
+            course=None if self.course is None else self.course.offsets,
+            run_deadline=self.run_deadline,
+            report=report
+        )
+        self.elapsed = time.perf_counter() - start
+        return self.get_stats()
+
+# programmatic entry point for training runs
+def train(
+    num_balls=argparser.DEFAULT_N,
+    difficulty=argparser.DEFAULT_D,
+    num_games=None,
+    num_workers=1,
+    max_ticks=None,
+    max_seconds=None,
+    max_run_seconds=None,
+    report=True
+):
+    Settings(argparse.Namespace(
+        d=difficulty,
+        n=num_balls,
+        max_ticks=max_ticks,
+        max_seconds=max_seconds
+    ))
+    core = neatinterface.NeatCore(headless=True)
+    # report turns off every per generation line printed to stdout
+    core.population.metrics = neat.MetricsLogger(echo=report)
+    runner = get_runner(core, num_workers, report=report)
+    return runner.run(num_games, max_run_seconds)
+
+def get_runner(
+    core,
+    num_workers=1,
+    report=True,
+    address=None,
+    num_islands=None,
+    migrate_every=argparser.DEFAULT_MIGRATE_EVERY,
+    num_migrants=argparser.DEFAULT_MIGRANTS
+):
+    if num_islands is not None:
+        return IslandRunner(
+            core.population,
+            num_islands,
+            migrate_every=migrate_every,
+            num_migrants=num_migrants,
+            course=core.course,
+            report=report
+        )
+    elif address is not None:
+        return DistributedRunner(
+            core.population,
+            address,
+            course=core.course,
+            report=report
+        )
+    elif num_workers > 1:
+        return ParallelRunner(
+            core.population,
+            num_workers,
+            course=core.course,
+            report=report
+        )
+    else:
+        return HeadlessRunner(core, report=report)
+
+# runs a worker for a DistributedRunner until the runner goes away
+def work(address):
+    neat.run_worker(
+        address,
+        neatinterface.simulate,
+        neatinterface.get_offsets,
+        configure=neatinterface.configure
+    )
+    return
@@ -1 +1,3 @@
-from lib.core import Core
+from lib.core import Core, ReplayCore
+from lib.profiler import Profiler
+from lib.replay import Recorder, Replay
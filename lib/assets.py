@@ -0,0 +1,37 @@
+import os
+import pygame
+
+# resources are looked up relative to the package
+# instead of the current working directory
+RSC_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "rsc"
+)
+
+# everything is loaded on first use and cached from then on,
+# so that importing the game does not touch any files
+_images = {}
+_fonts = {}
+
+def get_path(*names):
+    return os.path.join(RSC_PATH, *names)
+
+# images are converted to the pixel format of the display for fast blits
+# if a display exists by the time they are first loaded
+def get_image(name):
+    image = _images.get(name)
+    if image is None:
+        image = pygame.image.load(get_path("img", name))
+        if pygame.display.get_init() and pygame.display.get_surface() is not None:
+            image = image.convert_alpha()
+        _images[name] = image
+    return image
+
+def get_font(name, size):
+    font = _fonts.get((name, size))
+    if font is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = pygame.font.Font(get_path("font", name), size)
+        _fonts[(name, size)] = font
+    return font
@@ -5,6 +5,10 @@ ZOOM_LEVEL = 2
 
 # game objects
 START_POSITION = (80, 80)
+# should match the size of ball sprites
+BALL_SIZE = (16, 16)
+# should match the size of the brick wall sprite
+WALL_SIZE = (48, 240)
 HOLE_SIZE = 80
 HOLE_Y_VARIANCE = 40
 
@@ -14,6 +18,9 @@ MOVE_SPEED = -2
 
 # other settings
 TICKRATE = 60
+# rendering is capped at this rate regardless of simulation speed
+FRAMERATE = 60
+MAX_MULTIPLIER = 4096
 WALL_SPEED = -1
 CLOUD_SPEED = -0.5
 
@@ -1,35 +1,49 @@
+import os
 import sys
 # import random
 import pygame
 
+from lib import assets
 from lib.settings import Settings
 from lib.environment import Environment
+from lib.renderer import Renderer
 from lib.objects import Ball
+from lib.profiler import Profiler
+from lib.replay import Recorder
 from lib.constants import BLACK
+from lib.constants import MAX_MULTIPLIER
 
-pygame.init()
 settings = Settings()
 
 class TextRenderer:
-    __font = pygame.font.Font("./rsc/font/monogram.ttf", 16)
-    __line_height = __font.get_linesize()
+    __font_size = 16
+
+    # the font is rendered natively at the zoomed size instead of being scaled
+    # and is only loaded once some text is rendered
+    def __init__(self, zoom=1):
+        self.size = self.__font_size * zoom
+        return
+
+    def get_font(self):
+        return assets.get_font("monogram.ttf", self.size)
 
     # render a single line of text
     def text_to_surface(self, text):
-        return self.__font.render(text, False, BLACK)
+        return self.get_font().render(text, False, BLACK)
 
     # render multiple lines of texts
     def texts_to_surface(self, texts):
         text_surfaces = [self.text_to_surface(text) for text in texts]
+        line_height = self.get_font().get_linesize()
         surface = pygame.Surface(
             (
                 max(text_surface.get_width() for text_surface in text_surfaces),
-                len(text_surfaces) * self.__line_height
+                len(text_surfaces) * line_height
             ),
             pygame.SRCALPHA
         )
         for i, text_surface in enumerate(text_surfaces):
-            surface.blit(text_surface, (0, self.__line_height * i))
+            surface.blit(text_surface, (0, line_height * i))
         return surface
 
 class Events:
@@ -44,8 +58,14 @@ class Events:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 sys.exit()
-            if event.type == pygame.KEYDOWN and event.key == pygame.K_i:
-                self.info = not self.info
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_i:
+                    self.info = not self.info
+                # speed beyond the number keys goes up and down by doubling
+                elif event.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS):
+                    self.multiplier = min(max(self.multiplier, 1) * 2, MAX_MULTIPLIER)
+                elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                    self.multiplier = max(self.multiplier // 2, 1)
 
         # check for pressed keys and update variables accordingly
         pressed_keys = pygame.key.get_pressed()
@@ -57,47 +77,163 @@ class Events:
                 break
         return
 
-class Core:
+# stand-in for events when running without a display
+# nothing is ever pressed and the event queue is never pumped
+class HeadlessEvents:
     def __init__(self):
+        self.multiplier = 0
+        self.jump = False
+        self.info = False
+        return
+
+    def update(self):
+        return
+
+class Core:
+    def __init__(self, headless=False, profiler=None):
         self.game_count = 0
-        self.events = Events()
+        self.headless = headless
+        # timers are kept around even when profiling is off,
+        # in which case they do nothing
+        if profiler is None:
+            profiler = Profiler()
+        self.profiler = profiler
+        if self.headless:
+            self.events = HeadlessEvents()
+        else:
+            self.events = Events()
         self.text_renderer = TextRenderer()
+        # renderer drawing straight to the display, set by set_display
+        self.renderer = None
+        # course flown by every game; each game gets a new one if left empty
+        self.course = None
+        # wall clock time at which the whole run ends, if it is timed
+        self.run_deadline = None
+        # directory every game is recorded to, see lib.replay
+        self.record = None
+        self.recorder = None
 
         # empty declarations for linting
         self.balls = None
         self.env = None
         return
 
+    # sets the surface everything is drawn to at the given zoom level
+    # scaled sprites and fonts are rebuilt whenever this is called
+    def set_display(self, surface, zoom):
+        self.renderer = Renderer(zoom, surface)
+        self.text_renderer = TextRenderer(zoom)
+        return
+
     def new_game(self):
         self.game_count += 1
         self.balls = self.new_balls()
-        self.env = Environment(self.balls)
+        self.env = Environment(
+            self.balls,
+            headless=self.headless,
+            course=self.course,
+            deadline=settings.get_deadline(self.run_deadline)
+        )
+        if self.renderer is not None:
+            self.renderer.invalidate()
+        if self.record is not None:
+            self.recorder = Recorder(self.env)
 
     def new_balls(self):
         return [Ball() for _ in range(settings.num_balls)]
 
+    # events are handled once per rendered frame
+    # while the game may be stepped several times per frame
     def update(self):
+        self.handle_events()
+        self.step()
+
+    def handle_events(self):
         self.events.update()
         settings.update(self.events)
+        self.profiler.lap("events")
+
+    def step(self):
         # only cycle through balls alive in the environment for optimization
         for ball in self.env.balls:
             ball.update(self.events)
+        self.profiler.lap("think")
         self.env.update(self.events)
+        self.profiler.lap("physics")
 
     def game_over(self):
-        return self.env.game_over()
+        if self.env.game_over():
+            self.save_recording()
+            return True
+        else:
+            return False
+
+    def get_recording_path(self):
+        return os.path.join(self.record, "game_{:06d}.npz".format(self.game_count))
+
+    # extras are saved along with the recording, see Recorder.save
+    def save_recording(self, **extras):
+        if self.recorder is not None:
+            os.makedirs(self.record, exist_ok=True)
+            self.recorder.save(self.get_recording_path(), **extras)
+            self.recorder = None
+        return
 
     def draw(self):
-        surface = self.env.get_surface()
+        overlays = []
         if self.events.info:
-            surface.blit(self.get_info_surface(), (0, 0))
+            overlays.append((self.get_info_surface(), (0, 0)))
+        if self.renderer is None:
+            surface = self.env.get_surface(overlays)
+        else:
+            surface = self.renderer.draw(self.env, overlays)
+        self.profiler.lap("draw")
         return surface
 
+    # parts of the last drawn surface that changed since the frame before
+    def get_dirty_rects(self):
+        if self.renderer is None:
+            return self.env.get_dirty_rects()
+        return self.renderer.get_dirty_rects()
+
     def get_info_surface(self):
         texts = [
             " Game: {}".format(self.game_count),
             " Score: {}".format(self.env.score),
-            " Alive: {}".format(self.env.num_alive)
+            " Alive: {}".format(self.env.num_alive),
+            self.get_speed_text()
         ]
+        if self.profiler.enabled:
+            texts += self.profiler.get_texts()
 
         return self.text_renderer.texts_to_surface(texts)
+
+    def get_speed_text(self):
+        if self.events.multiplier == 0:
+            return " Speed: max"
+        else:
+            return " Speed: {}x".format(self.events.multiplier)
+
+# plays a replay in place of a live game
+class ReplayCore(Core):
+    def __init__(self, replay, profiler=None):
+        super().__init__(profiler=profiler)
+        self.replay = replay
+        return
+
+    def new_game(self):
+        self.game_count += 1
+        self.replay.seek(0)
+        self.env = self.replay.env
+        self.balls = self.env.all_balls
+        if self.renderer is not None:
+            self.renderer.invalidate()
+        return
+
+    def step(self):
+        self.replay.step()
+        self.profiler.lap("physics")
+        return
+
+    def game_over(self):
+        return self.replay.done()
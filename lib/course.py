@@ -0,0 +1,55 @@
+import functools
+import random
+import numpy as np
+
+from lib.constants import HOLE_Y_VARIANCE
+
+# number of walls in a course before it starts over from the first wall
+DEFAULT_LENGTH = 1 << 16
+
+# hole offsets from the middle of the screen for consecutive walls of a game
+# generated ahead of time from a seed, so that any number of environments,
+# in any number of processes, can fly exactly the same course;
+# offsets are never written to and may be backed by a memory mapped file
+# or shared memory
+class Course:
+    def __init__(self, offsets, seed=None):
+        self.offsets = offsets
+        self.length = len(offsets)
+        # seed the course was generated from, if known
+        self.seed = seed
+        return
+
+    @classmethod
+    def generate(cls, seed=None, length=DEFAULT_LENGTH):
+        if seed is None:
+            seed = random.getrandbits(32)
+        rng = np.random.default_rng(seed)
+        offsets = rng.integers(
+            -HOLE_Y_VARIANCE,
+            HOLE_Y_VARIANCE,
+            size=length,
+            dtype=np.int16,
+            endpoint=True
+        )
+        offsets.flags.writeable = False
+        return cls(offsets, seed)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        offsets = np.load(path, mmap_mode="r" if mmap else None)
+        offsets.flags.writeable = False
+        return cls(offsets)
+
+    def save(self, path):
+        np.save(path, self.offsets)
+        return
+
+    # hole offset of the k-th wall
+    def get_offset(self, k):
+        return int(self.offsets[k % self.length])
+
+# courses generated from the same seed are only generated once per process
+@functools.lru_cache(maxsize=16)
+def get_course(seed, length=DEFAULT_LENGTH):
+    return Course.generate(seed, length)
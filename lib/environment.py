@@ -1,73 +1,187 @@
-import random
-import pygame
+import time
+from itertools import compress
+import numpy as np
 
 from lib.settings import Settings
-from lib.objects import Ball, Wall, Buildings, Cloud
-from lib.constants import RESOLUTION, WIDTH, HEIGHT
-from lib.constants import HOLE_Y_VARIANCE
-from lib.constants import SKY_BLUE
+from lib.objects import Wall, Buildings, Cloud
+from lib.physics import BallStates, get_wall_window
+from lib.course import Course
+from lib.renderer import Renderer
+from lib.constants import WIDTH, HEIGHT
 
-pygame.init()
 settings = Settings()
 
 # maybe these functions should be inside core
+# balls are handled separately by BallStates
 def out_of_bounds(game_object):
-    if isinstance(game_object, Ball):
-        return (game_object.rect.top < 0) or (game_object.rect.bottom > HEIGHT)
-    elif isinstance(game_object, Wall) or isinstance(game_object, Cloud):
+    if isinstance(game_object, Wall) or isinstance(game_object, Cloud):
         return game_object.rect.right < 0
     else:
         return False
 
-def collision(ball, walls):
-    # for the current setup, we only need to check with the first wall
-    wall = walls[0]
-    if ball.rect.right >= wall.hole_rect.left and \
-        ball.rect.left <= wall.hole_rect.right:
-        return ball.rect.bottom >= wall.hole_rect.bottom or \
-            ball.rect.top <= wall.hole_rect.top
-    else:
-        return False
-
 # environment should be oblivious of whether ai is being used or not
 class Environment:
     __num_walls = 5
     __num_clouds = 10
-    # background objects are declared here so they do not reset on new games
-    buildings = Buildings()
-    clouds = []
-    for _ in range(__num_clouds):
-        clouds.append(Cloud())
-
-    def __init__(self, balls):
+    # background objects are shared so they do not reset on new games,
+    # and are only created once something is going to be drawn
+    buildings = None
+    clouds = None
+
+    def __init__(self, balls, headless=False, course=None, deadline=None):
+        # background objects are purely cosmetic and are left alone
+        # when nothing is going to be rendered
+        self.headless = headless
+        # hole offsets of walls; environments given the same course
+        # fly the same walls, and a new random course is made otherwise
+        if course is None:
+            course = Course.generate()
+        self.course = course
+        # wall clock time at which the game is stopped, see Settings.get_deadline
+        self.deadline = deadline
         self.score = 0
+        # physical state of every ball is kept in a single struct of arrays
+        self.states = BallStates(len(balls))
+        for i, ball in enumerate(balls):
+            ball.bind(self.states, i)
         # make a shallow copy to keep track of live balls
+        # live holds their indices in the same order
+        self.all_balls = balls
         self.balls = balls[:]
+        self.live = np.arange(len(balls))
         self.num_alive = len(self.balls)
 
+        # number of walls removed so far, which makes the first wall
+        # the wall_count-th wall of the game, and the ticks it can be hit in
+        self.wall_count = 0
+        self.window = get_wall_window(self.wall_count)
         self.walls = []
         for _ in range(self.__num_walls):
             self.add_wall()
 
-        self.surface = pygame.Surface(RESOLUTION)
+        self.renderer = None
+        if not self.headless:
+            self.init_background()
+        # optional lib.replay.Recorder called at the start of every tick
+        self.recorder = None
+        return
+
+    @classmethod
+    def init_background(cls):
+        if cls.buildings is None:
+            cls.buildings = Buildings()
+            cls.clouds = [Cloud() for _ in range(cls.__num_clouds)]
+        return
+
+    # starts background objects over, so that a game replayed with
+    # the same state of random looks exactly the same every time
+    @classmethod
+    def reset_background(cls):
+        cls.buildings = None
+        cls.init_background()
         return
 
     def update(self, events):
+        if self.recorder is not None:
+            self.recorder.record(self)
+
         # move game objects
-        self.buildings.move()
-        for ball in self.balls:
-            ball.move()
-            ball.accelerate()
+        self.states.move()
         for wall in self.walls:
             wall.move()
-        for cloud in self.clouds:
-            cloud.move()
 
         # remove a wall if it gets past the screen and add in a new one
         if out_of_bounds(self.walls[0]):
             self.remove_wall()
             self.add_wall()
 
+        if not self.headless:
+            self.update_background()
+
+        # kill balls if necessary
+        # for the current setup, we only need to check with the first wall
+        # and only while it overlaps the balls, which happens in known ticks;
+        # the rest of the time balls only need to stay on the screen
+        ticks = self.score + 1
+        hole_rect = None
+        if self.window[0] <= ticks <= self.window[1]:
+            hole_rect = self.walls[0].hole_rect
+        states = self.states
+        tops = states.get_tops(self.live)
+        dying = states.get_dying(tops, states.get_safe_band(hole_rect))
+        if dying.any():
+            # assign score to the balls before killing them off
+            dead = self.live[dying]
+            states.score[dead] = self.score
+            states.alive[dead] = False
+            # compact live balls in a single pass, keeping their order
+            survived = ~dying
+            self.live = self.live[survived]
+            self.balls = list(compress(self.balls, survived))
+            self.num_alive = len(self.live)
+
+        self.score += 1
+
+        # balls still alive once the game runs out of budget
+        # are scored as if they died right now
+        if self.out_of_budget():
+            self.stop()
+        return
+
+    def out_of_budget(self):
+        if settings.max_ticks is not None and self.score >= settings.max_ticks:
+            return True
+        if self.deadline is not None and time.time() >= self.deadline:
+            return True
+        return False
+
+    # ends the game early, scoring every live ball with the current score
+    def stop(self):
+        self.states.score[self.live] = self.score
+        self.states.alive[self.live] = False
+        self.live = self.live[:0]
+        self.balls = []
+        self.num_alive = 0
+        return
+
+    # physical state of the game, which is enough to pick it up again
+    # with set_snapshot; the background is left out
+    def get_snapshot(self):
+        return {
+            "score": self.score,
+            "wall_count": self.wall_count,
+            "wall_x": np.array([wall.x for wall in self.walls]),
+            "y": self.states.y.copy(),
+            "velocity": self.states.velocity.copy(),
+            "alive": self.states.alive.copy(),
+            "ball_score": self.states.score.copy(),
+        }
+
+    def set_snapshot(self, snapshot):
+        self.score = int(snapshot["score"])
+        self.wall_count = int(snapshot["wall_count"])
+        self.window = get_wall_window(self.wall_count)
+        # holes of walls follow from the course
+        self.walls = [
+            Wall(int(x), (HEIGHT // 2) + self.course.get_offset(self.wall_count + i))
+            for i, x in enumerate(snapshot["wall_x"])
+        ]
+
+        states = self.states
+        states.y[:] = snapshot["y"]
+        states.velocity[:] = snapshot["velocity"]
+        states.alive[:] = snapshot["alive"]
+        states.score[:] = snapshot["ball_score"]
+        self.live = np.flatnonzero(states.alive)
+        self.balls = [self.all_balls[i] for i in self.live]
+        self.num_alive = len(self.live)
+        return
+
+    def update_background(self):
+        self.buildings.move()
+        for cloud in self.clouds:
+            cloud.move()
+
         dead_clouds = []
         for cloud in self.clouds:
             if out_of_bounds(cloud):
@@ -75,37 +189,21 @@ class Environment:
         for dead_cloud in dead_clouds:
             self.remove_cloud(dead_cloud)
         self.add_clouds()
-
-        # kill a ball if necessary
-        # a shallow copy is required for proper removal
-        for ball in self.balls[:]:
-            if ball.alive and \
-                (out_of_bounds(ball) or collision(ball, self.walls)):
-                # assign score to the ball before killing it off
-                ball.score = self.score
-                ball.alive = False
-                self.balls.remove(ball)
-                self.num_alive -= 1
-
-        self.score += 1
         return
 
     def game_over(self):
         return self.num_alive == 0
 
-    def get_surface(self):
-        self.surface.fill(SKY_BLUE)
-
-        # render game objects
-        self.surface.blit(self.buildings.get_surface(), self.buildings.rect)
-        for cloud in self.clouds:
-            self.surface.blit(cloud.get_surface(), cloud.rect)
-        for ball in self.balls:
-            self.surface.blit(ball.get_surface(), ball.rect)
-        for wall in self.walls:
-            self.surface.blit(wall.get_surface(), wall.rect)
+    # overlays are (surface, position) pairs drawn on top of everything else
+    def get_surface(self, overlays=()):
+        # renderer is only created once something is actually drawn
+        if self.renderer is None:
+            self.init_background()
+            self.renderer = Renderer()
+        return self.renderer.draw(self, overlays)
 
-        return self.surface
+    def get_dirty_rects(self):
+        return self.renderer.get_dirty_rects()
 
     def add_wall(self):
         # if no wall exists, add one at the right end of the screen
@@ -116,13 +214,16 @@ class Environment:
         else:
             x = self.walls[-1].x + settings.wall_distance
 
-        y = (HEIGHT // 2) + random.randint(-HOLE_Y_VARIANCE, HOLE_Y_VARIANCE)
+        k = self.wall_count + len(self.walls)
+        y = (HEIGHT // 2) + self.course.get_offset(k)
 
         self.walls.append(Wall(x, y))
         return
 
     def remove_wall(self):
         self.walls.pop(0)
+        self.wall_count += 1
+        self.window = get_wall_window(self.wall_count)
         return
 
     def add_clouds(self):
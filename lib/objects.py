@@ -1,91 +1,91 @@
 import random
 import pygame
 
+from lib import assets
 from lib.settings import Settings
 from lib.constants import WIDTH, HEIGHT
-from lib.constants import START_POSITION, GRAVITY, MOVE_SPEED
-from lib.constants import HOLE_SIZE
+from lib.constants import START_POSITION, MOVE_SPEED
+from lib.constants import BALL_SIZE, WALL_SIZE, HOLE_SIZE
 from lib.constants import WALL_SPEED, CLOUD_SPEED
 
-pygame.init()
 settings = Settings()
 
-def load_image(file):
-    image = pygame.image.load(file)
-    return image
+# ball colors in the order of their color codes
+COLORS = ["blue", "green", "yellow", "red"]
 
+# sprites are only loaded once something is drawn,
+# while sizes used by the simulation come from constants
 class Ball:
-    # default image for size reference
-    __image = load_image("./rsc/img/blue_ball_falling.png")
-    # lazy implementation of colored balls
-    __images = {
-        "blue_jumping": load_image("./rsc/img/blue_ball_jumping.png"),
-        "blue_falling": load_image("./rsc/img/blue_ball_falling.png"),
-        "green_jumping": load_image("./rsc/img/green_ball_jumping.png"),
-        "green_falling": load_image("./rsc/img/green_ball_falling.png"),
-        "yellow_jumping": load_image("./rsc/img/yellow_ball_jumping.png"),
-        "yellow_falling": load_image("./rsc/img/yellow_ball_falling.png"),
-        "red_jumping": load_image("./rsc/img/red_ball_jumping.png"),
-        "red_falling": load_image("./rsc/img/red_ball_falling.png"),
-    }
-    __colors = ["blue", "green", "yellow", "red"]
+    # sprites indexed by sprite code, which is color code * 2 + jumping
+    # so that whole populations can be drawn without building string keys
+    __sprites = None
 
     def __init__(self, color=None):
-        self.rect = self.__image.get_rect()
         # randomize color if it is not given
         if color is None:
-            self.color = random.choice(self.__colors)
+            self.color = random.choice(COLORS)
         else:
             self.color = color
-        self.x, self.y = START_POSITION
-        self.rect.center = (self.x, self.y)
-        self.velocity = 0.0
-        self.score = 0
-        self.alive = True
-        self.jump_state = False
+        self.x = START_POSITION[0]
+        # physical state lives in the struct of arrays
+        # owned by the environment this ball is bound to
+        self.states = None
+        self.index = None
         return
 
-    def update(self, events):
-        if events.jump:
-            self.jump()
+    def bind(self, states, index):
+        self.states = states
+        self.index = index
+        states.colors[index] = COLORS.index(self.color)
         return
 
-    def move(self):
-        # center should be used instead of move method
-        # otherwise misalignment becomes a problem down the line
-        self.y = self.y + self.velocity
-        self.rect.center = (self.x, self.y)
-        return
+    @classmethod
+    def get_sprites(cls):
+        if cls.__sprites is None:
+            cls.__sprites = [
+                assets.get_image("{}_ball_{}.png".format(color, state))
+                for color in COLORS
+                for state in ["falling", "jumping"]
+            ]
+        return cls.__sprites
+
+    @property
+    def y(self):
+        return self.states.y[self.index]
+
+    @property
+    def velocity(self):
+        return self.states.velocity[self.index]
+
+    @property
+    def score(self):
+        return self.states.score[self.index]
+
+    @property
+    def alive(self):
+        return self.states.alive[self.index]
+
+    @property
+    def rect(self):
+        rect = pygame.Rect((0, 0), BALL_SIZE)
+        rect.center = (self.x, self.y)
+        return rect
 
-    def accelerate(self):
-        self.velocity += + GRAVITY
+    def update(self, events):
+        if events.jump:
+            self.jump()
         return
 
     def jump(self):
-        self.velocity = settings.jump_velocity
+        self.states.jump(self.index)
+        return
 
     def get_surface(self):
-        if self.velocity < 0:
-            state = "jumping"
-        else:
-            state = "falling"
-        key = "{}_{}".format(self.color, state)
-
-        return self.__images[key]
+        return self.get_sprites()[self.states.get_sprites(self.index)]
 
 class Wall:
-    # class initialization
-    __image = load_image("./rsc/img/brick_wall.png")
-
-    __width, __height = __image.get_size()
-    __y_offset = (HOLE_SIZE + __height) // 2
-
-    __surface = pygame.Surface(
-        (__width, __height * 2 + HOLE_SIZE),
-        pygame.SRCALPHA
-    )
-    __surface.blit(__image, (0, 0))
-    __surface.blit(__image, (0, __height + HOLE_SIZE))
+    __width, __height = WALL_SIZE
+    __surface = None
 
     __speed = MOVE_SPEED
 
@@ -93,8 +93,8 @@ class Wall:
     def __init__(self, x, y):
         self.x = x
         self.y = y
-        self.rect = self.__surface.get_rect()
-        self.hole_rect = pygame.Rect(0, 0, self.__surface.get_width(), HOLE_SIZE)
+        self.rect = pygame.Rect(0, 0, self.__width, self.__height * 2 + HOLE_SIZE)
+        self.hole_rect = pygame.Rect(0, 0, self.__width, HOLE_SIZE)
         self.rect.center = self.hole_rect.center = (self.x, self.y)
         return
 
@@ -103,25 +103,27 @@ class Wall:
         self.rect.center = self.hole_rect.center = (self.x, self.y)
         return
 
-    def get_surface(self):
-        return self.__surface
+    @classmethod
+    def get_surface(cls):
+        if cls.__surface is None:
+            image = assets.get_image("brick_wall.png")
+            cls.__surface = pygame.Surface(
+                (cls.__width, cls.__height * 2 + HOLE_SIZE),
+                pygame.SRCALPHA
+            )
+            cls.__surface.blit(image, (0, 0))
+            cls.__surface.blit(image, (0, cls.__height + HOLE_SIZE))
+        return cls.__surface
 
 class Buildings:
-    __image = load_image("./rsc/img/buildings.png")
-    __tile_width, __tile_height = __image.get_size()
-    __num_tiles = (WIDTH // __tile_width) + 2
-    __surface = pygame.Surface(
-        (__tile_width * __num_tiles, __tile_height),
-        pygame.SRCALPHA
-    )
-
-    for i in range(__num_tiles):
-        __surface.blit(__image, (__tile_width * i, 0))
+    __surface = None
 
     def __init__(self, x=0):
+        self.__tile_width, self.__tile_height = \
+            assets.get_image("buildings.png").get_size()
         self.x = x
         self.y = HEIGHT - self.__tile_height
-        self.rect = self.__surface.get_rect()
+        self.rect = self.get_surface().get_rect()
         self.rect.left = self.x
         self.rect.top = self.y
 
@@ -131,13 +133,23 @@ class Buildings:
             self.x += self.__tile_width
         self.rect.left = self.x
 
-    def get_surface(self):
-        return self.__surface
+    @classmethod
+    def get_surface(cls):
+        if cls.__surface is None:
+            image = assets.get_image("buildings.png")
+            tile_width, tile_height = image.get_size()
+            num_tiles = (WIDTH // tile_width) + 2
+            cls.__surface = pygame.Surface(
+                (tile_width * num_tiles, tile_height),
+                pygame.SRCALPHA
+            )
+            for i in range(num_tiles):
+                cls.__surface.blit(image, (tile_width * i, 0))
+        return cls.__surface
 
 class Cloud:
-    __image = load_image("./rsc/img/cloud.png")
-
     def __init__(self):
+        self.__image = assets.get_image("cloud.png")
         self.x = random.randint(0, WIDTH + self.__image.get_width())
         self.y = random.randint(
             int(HEIGHT * (1/8)),
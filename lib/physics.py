@@ -0,0 +1,80 @@
+import numpy as np
+
+from lib.settings import Settings
+from lib.constants import WIDTH, HEIGHT
+from lib.constants import START_POSITION, BALL_SIZE, WALL_SIZE
+from lib.constants import GRAVITY, MOVE_SPEED
+
+settings = Settings()
+
+# horizontal extent of every ball is fixed since balls never move sideways
+BALL_LEFT = START_POSITION[0] - (BALL_SIZE[0] // 2)
+BALL_RIGHT = BALL_LEFT + BALL_SIZE[0]
+# range of x positions of a wall, given by the center of its hole,
+# at which its rect overlaps the column every ball flies in
+WALL_X_MIN = BALL_LEFT - WALL_SIZE[0] + (WALL_SIZE[0] // 2)
+WALL_X_MAX = BALL_RIGHT + (WALL_SIZE[0] // 2)
+
+# pygame rounds half away from zero when assigning float coordinates to a rect
+def round_coordinates(a):
+    return np.trunc(a + np.copysign(0.5, a))
+
+# first and last tick at which the k-th wall of a game overlaps the ball column
+# where ticks count wall moves since the start of the game;
+# walls start at the right end of the screen, are spaced wall_distance apart
+# and all move at the same speed, so this is known ahead of time
+def get_wall_window(k):
+    x = WIDTH + k * settings.wall_distance
+    speed = -MOVE_SPEED
+    first = -((WALL_X_MAX - x) // speed)
+    last = (x - WALL_X_MIN) // speed
+    return first, last
+
+# struct of arrays holding the physical state of a whole population of balls
+# index i corresponds to the i-th ball given to the environment
+class BallStates:
+    def __init__(self, n):
+        self.n = n
+        self.y = np.full(n, float(START_POSITION[1]))
+        self.velocity = np.zeros(n)
+        self.alive = np.ones(n, dtype=bool)
+        self.score = np.zeros(n, dtype=np.int64)
+        # cosmetic only; set when balls are bound and used to pick sprites
+        self.colors = np.zeros(n, dtype=np.int8)
+        # balls that jumped since the last tick, only kept while recording
+        self.jumps = None
+        return
+
+    def move(self):
+        # dead balls are moved along as well,
+        # since masking them out costs more than it saves
+        self.y += self.velocity
+        self.velocity += GRAVITY
+        return
+
+    def jump(self, idx):
+        self.velocity[idx] = settings.jump_velocity
+        if self.jumps is not None:
+            self.jumps[idx] = True
+        return
+
+    def get_tops(self, idx):
+        return round_coordinates(self.y[idx]) - (BALL_SIZE[1] // 2)
+
+    # sprite codes as used by Ball.get_sprites
+    def get_sprites(self, idx):
+        return self.colors[idx] * 2 + (self.velocity[idx] < 0)
+
+    # range of tops balls survive at; within the screen and,
+    # if a hole is given, strictly inside of it
+    # same semantics as comparing ball rects against the screen and the hole
+    def get_safe_band(self, hole_rect=None):
+        low = 0
+        high = HEIGHT - BALL_SIZE[1]
+        if hole_rect is not None:
+            low = max(low, hole_rect.top + 1)
+            high = min(high, hole_rect.bottom - BALL_SIZE[1] - 1)
+        return low, high
+
+    def get_dying(self, tops, band):
+        return (tops < band[0]) | (tops > band[1])
@@ -0,0 +1,80 @@
+import sys
+import time
+import numpy as np
+
+PHASES = ["events", "sense", "think", "physics", "draw", "present"]
+CAPACITY = 600
+
+# low overhead timers for phases of the main loop
+# time spent in each phase is accumulated into the current row
+# of a ring buffer, and a new row is started once per loop iteration;
+# when disabled, every call returns right away
+class Profiler:
+    def __init__(self, phases=PHASES, capacity=CAPACITY, enabled=False):
+        self.phases = phases
+        self.index = {phase: i for i, phase in enumerate(self.phases)}
+        self.capacity = capacity
+        self.enabled = enabled
+
+        self.samples = np.zeros((self.capacity, len(self.phases)))
+        self.row = 0
+        self.count = 0
+        self.last = 0.0
+        return
+
+    # starts a new row and marks the beginning of the first phase
+    def start(self):
+        if not self.enabled:
+            return
+        self.row = self.count % self.capacity
+        self.samples[self.row] = 0
+        self.count += 1
+        self.last = time.perf_counter()
+        return
+
+    # attributes time since the last mark to the given phase
+    def lap(self, phase):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.samples[self.row, self.index[phase]] += now - self.last
+        self.last = now
+        return
+
+    # filled rows in seconds, oldest first
+    def get_samples(self):
+        if self.count <= self.capacity:
+            return self.samples[:self.count]
+        return np.roll(self.samples, -(self.row + 1), axis=0)
+
+    # mean seconds spent in each phase per loop iteration
+    def get_means(self):
+        samples = self.get_samples()
+        if len(samples) == 0:
+            return {phase: 0.0 for phase in self.phases}
+        return dict(zip(self.phases, samples.mean(axis=0).tolist()))
+
+    def get_texts(self):
+        return [
+            " {}: {:.2f} ms".format(phase.capitalize(), mean * 1000)
+            for phase, mean in self.get_means().items()
+        ]
+
+    def dump(self, file=None):
+        if file is None:
+            file = sys.stdout
+        samples = self.get_samples()
+        if len(samples) == 0:
+            return
+        total = samples.sum(axis=1).mean()
+        print("phase      mean ms   max ms   share", file=file)
+        for i, phase in enumerate(self.phases):
+            mean = samples[:, i].mean()
+            print("{:<9}{:>9.3f}{:>9.3f}{:>7.1%}".format(
+                phase,
+                mean * 1000,
+                samples[:, i].max() * 1000,
+                mean / total if total > 0 else 0.0
+            ), file=file)
+        print("over the last {} iterations".format(len(samples)), file=file)
+        return
@@ -0,0 +1,174 @@
+import numpy as np
+import pygame
+
+from lib.objects import Ball
+from lib.physics import BALL_LEFT
+from lib.constants import WIDTH, HEIGHT
+from lib.constants import BALL_SIZE
+from lib.constants import SKY_BLUE
+
+# beyond this many dirty rects, a single full screen update is cheaper
+MAX_DIRTY_RECTS = 64
+# number of distinct ball sprites, see Ball.get_sprites
+NUM_SPRITES = 8
+
+# sky and buildings composed once into a strip wider than the screen
+# that is scrolled along with the buildings instead of being redrawn
+_background = None
+
+def get_background(buildings):
+    global _background
+    if _background is None:
+        strip = buildings.get_surface()
+        _background = pygame.Surface((strip.get_width(), HEIGHT))
+        _background.fill(SKY_BLUE)
+        _background.blit(strip, (0, buildings.rect.top))
+    return _background
+
+# sprites scaled once for the active zoom level and reused every frame
+# keyed by the original surface; scaled copies for any other zoom
+# level are thrown away when the zoom level changes
+_scaled = {}
+_scaled_zoom = None
+
+def get_scaled(surface, zoom):
+    global _scaled_zoom
+    if zoom != _scaled_zoom:
+        _scaled.clear()
+        _scaled_zoom = zoom
+    scaled = _scaled.get(surface)
+    if scaled is None:
+        scaled = pygame.transform.scale(
+            surface,
+            (surface.get_width() * zoom, surface.get_height() * zoom)
+        )
+        # match the pixel format of the display for fast blits
+        if pygame.display.get_surface() is not None:
+            scaled = scaled.convert_alpha()
+        _scaled[surface] = scaled
+    return scaled
+
+def scale_rect(rect, zoom):
+    return pygame.Rect(
+        rect.x * zoom,
+        rect.y * zoom,
+        rect.width * zoom,
+        rect.height * zoom
+    )
+
+# layered renderer for an environment
+# the background is restored only where sprites were drawn in the last frame
+# and where the buildings scrolled, and the rest of the surface is left alone
+# the scene is composed directly at zoomed resolution from pre-scaled sprites,
+# optionally onto a given surface such as the display itself;
+# overlays are expected to be at zoomed resolution already;
+# with dedup set, balls sharing both position and sprite are drawn only once;
+# the copy drawn last covers the others entirely, so this changes nothing on screen
+class Renderer:
+    def __init__(self, zoom=1, surface=None, dedup=True):
+        self.zoom = zoom
+        self.dedup = dedup
+        if surface is None:
+            surface = pygame.Surface((WIDTH * zoom, HEIGHT * zoom))
+        self.surface = surface
+        self.screen_rect = self.surface.get_rect()
+        # rects drawn over in the last frame and rects changed in this frame
+        self.drawn = []
+        self.dirty = []
+        self.full = True
+        self.scroll = None
+        return
+
+    # forces the next frame to be redrawn from scratch
+    def invalidate(self):
+        self.full = True
+        return
+
+    def draw(self, env, overlays=()):
+        zoom = self.zoom
+        background = get_scaled(get_background(env.buildings), zoom)
+        # offset into the background strip for the current buildings position
+        scroll = -env.buildings.rect.left * zoom
+        strip_rect = scale_rect(
+            pygame.Rect(
+                0,
+                env.buildings.rect.top,
+                WIDTH,
+                HEIGHT - env.buildings.rect.top
+            ),
+            zoom
+        )
+
+        if self.full:
+            self.surface.blit(background, (0, 0), self.screen_rect.move(scroll, 0))
+            dirty = [self.screen_rect]
+        else:
+            dirty = list(self.drawn)
+            for rect in self.drawn:
+                self.surface.blit(background, rect, rect.move(scroll, 0))
+            if scroll != self.scroll:
+                self.surface.blit(background, strip_rect, strip_rect.move(scroll, 0))
+                dirty.append(strip_rect)
+
+        # render game objects
+        drawn = []
+        blit = self.surface.blit
+        for cloud in env.clouds:
+            drawn.append(blit(
+                get_scaled(cloud.get_surface(), zoom),
+                scale_rect(cloud.rect, zoom)
+            ))
+        if env.num_alive:
+            drawn.append(self.draw_balls(env))
+        for wall in env.walls:
+            drawn.append(blit(
+                get_scaled(wall.get_surface(), zoom),
+                scale_rect(wall.rect, zoom)
+            ))
+        for surface, position in overlays:
+            drawn.append(blit(surface, position))
+
+        self.drawn = [rect for rect in drawn if rect.width and rect.height]
+        self.dirty = dirty + self.drawn
+        self.full = False
+        self.scroll = scroll
+        return self.surface
+
+    # draws all live balls with a single batched blit
+    # and returns the rect covering them
+    def draw_balls(self, env):
+        zoom = self.zoom
+        states = env.states
+        tops = states.get_tops(env.live).astype(np.int64)
+        codes = states.get_sprites(env.live)
+        if self.dedup:
+            # only the last of each run of identical balls is drawn,
+            # in live order, so that overlapping balls stack as they would
+            keys = tops * NUM_SPRITES + codes
+            _, last = np.unique(keys[::-1], return_index=True)
+            idx = np.sort(len(keys) - 1 - last)
+            tops, codes = tops[idx], codes[idx]
+
+        sprites = [get_scaled(sprite, zoom) for sprite in Ball.get_sprites()]
+        x = BALL_LEFT * zoom
+        self.surface.blits(
+            [
+                (sprites[code], (x, y))
+                for y, code in zip((tops * zoom).tolist(), codes.tolist())
+            ],
+            doreturn=False
+        )
+
+        # balls never move sideways, so a single column covers all of them
+        top = int(tops.min())
+        bottom = int(tops.max()) + BALL_SIZE[1]
+        return scale_rect(
+            pygame.Rect(BALL_LEFT, top, BALL_SIZE[0], bottom - top),
+            zoom
+        ).clip(self.screen_rect)
+
+    # rects of the surface that changed since the last frame
+    def get_dirty_rects(self):
+        if len(self.dirty) > MAX_DIRTY_RECTS:
+            return [self.screen_rect]
+        return self.dirty
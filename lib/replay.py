@@ -0,0 +1,123 @@
+import argparse
+import json
+import numpy as np
+
+from lib.settings import Settings
+from lib.course import Course, get_course
+from lib.objects import Ball
+from lib.environment import Environment
+
+settings = Settings()
+
+# ticks between snapshots of the game state, which bound the number
+# of ticks that have to be replayed to seek to any tick
+SNAPSHOT_EVERY = 600
+# see Environment.get_snapshot
+SNAPSHOT_FIELDS = [
+    "score",
+    "wall_count",
+    "wall_x",
+    "y",
+    "velocity",
+    "alive",
+    "ball_score",
+]
+
+# records a game as the jumps of every ball, one bit per ball per tick,
+# along with snapshots of the game state every so often;
+# everything else follows from the course and physics
+class Recorder:
+    def __init__(self, env, snapshot_every=SNAPSHOT_EVERY):
+        self.env = env
+        self.snapshot_every = snapshot_every
+        self.rows = []
+        self.snapshots = []
+        env.states.jumps = np.zeros(env.states.n, dtype=bool)
+        env.recorder = self
+        return
+
+    # called by the environment at the start of every tick
+    def record(self, env):
+        if env.score % self.snapshot_every == 0:
+            self.snapshots.append(env.get_snapshot())
+        self.rows.append(np.packbits(env.states.jumps))
+        env.states.jumps[:] = False
+        return
+
+    # arrays given as extras, such as weights of genomes, are saved alongside
+    def save(self, path, **extras):
+        env = self.env
+        course = env.course
+        snapshots = {
+            "snapshot_" + field: np.stack([s[field] for s in self.snapshots])
+            for field in SNAPSHOT_FIELDS
+        }
+        np.savez_compressed(
+            path,
+            config=json.dumps(settings.get_config()),
+            num_balls=env.states.n,
+            colors=env.states.colors,
+            seed=-1 if course.seed is None else course.seed,
+            course=course.offsets if course.seed is None else np.zeros(0),
+            course_length=course.length,
+            jumps=np.stack(self.rows) if self.rows else np.zeros((0, 0), dtype=np.uint8),
+            scores=env.states.score,
+            ticks=env.score,
+            **snapshots,
+            **extras
+        )
+        return
+
+# plays a recorded game back by applying recorded jumps to physics alone
+# loading a replay applies the settings it was recorded with
+class Replay:
+    def __init__(self, path, headless=True):
+        with np.load(path) as data:
+            self.data = {key: data[key] for key in data.files}
+        data = self.data
+        Settings(argparse.Namespace(**json.loads(str(data["config"]))))
+
+        self.num_balls = int(data["num_balls"])
+        self.ticks = int(data["ticks"])
+        self.jumps = data["jumps"]
+        seed = int(data["seed"])
+        if seed >= 0:
+            self.course = get_course(seed, int(data["course_length"]))
+        else:
+            self.course = Course(data["course"])
+
+        balls = [Ball() for _ in range(self.num_balls)]
+        self.env = Environment(balls, headless=headless, course=self.course)
+        # colors are cosmetic, but replays should look like the original
+        self.env.states.colors[:] = data["colors"]
+        self.snapshot_ticks = data["snapshot_score"]
+        return
+
+    def get_snapshot(self, i):
+        return {
+            field: self.data["snapshot_" + field][i]
+            for field in SNAPSHOT_FIELDS
+        }
+
+    # restores the latest snapshot at or before the given tick
+    # and replays the rest of the way
+    def seek(self, tick):
+        tick = min(tick, self.ticks)
+        i = np.searchsorted(self.snapshot_ticks, tick, side="right") - 1
+        self.env.set_snapshot(self.get_snapshot(i))
+        while self.env.score < tick:
+            self.step()
+        return
+
+    def step(self):
+        env = self.env
+        bits = np.unpackbits(self.jumps[env.score], count=self.num_balls)
+        env.states.jump(np.flatnonzero(bits))
+        env.update(None)
+        # games cut short by a wall clock budget end where the recording does
+        if env.score >= self.ticks and not env.game_over():
+            env.stop()
+        return
+
+    def done(self):
+        return self.env.score >= self.ticks or self.env.game_over()
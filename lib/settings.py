@@ -1,4 +1,6 @@
-from lib.constants import TICKRATE
+import time
+
+from lib.constants import TICKRATE, FRAMERATE
 
 DIFFICULTY_SETTINGS = {
     "easy": {
@@ -27,12 +29,38 @@ class Settings:
     # this should be called at least once with args in main.py
     def __init__(self, args=None):
         if args is not None:
+            self.difficulty = args.d
             self.tickrate = TICKRATE
+            self.framerate = FRAMERATE
             self.wall_distance = DIFFICULTY_SETTINGS[args.d]["wall_distance"]
             self.jump_velocity = DIFFICULTY_SETTINGS[args.d]["jump_velocity"]
             self.num_balls = args.n
+            # budgets for a single game; games are unlimited if left empty
+            self.max_ticks = getattr(args, "max_ticks", None)
+            self.max_seconds = getattr(args, "max_seconds", None)
         return
 
+    # arguments that make the same settings in another process
+    def get_config(self):
+        return {
+            "d": self.difficulty,
+            "n": self.num_balls,
+            "max_ticks": self.max_ticks,
+            "max_seconds": self.max_seconds,
+        }
+
+    # wall clock time at which a game starting now runs out of time,
+    # capped by the end of the whole run if given;
+    # None means the game is not timed
+    def get_deadline(self, run_deadline=None):
+        deadline = run_deadline
+        if self.max_seconds is not None:
+            game_deadline = time.time() + self.max_seconds
+            if deadline is None or game_deadline < deadline:
+                deadline = game_deadline
+        return deadline
+
+    # tick rate of 0 means the simulation runs as fast as possible
     def update(self, events):
         self.tickrate = TICKRATE * events.multiplier
         return
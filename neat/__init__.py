@@ -1 +1,6 @@
 from neat.neat import Population
+from neat.parallel import ParallelEvaluator
+from neat.distributed import DistributedEvaluator, run_worker
+from neat.checkpoint import save_checkpoint, load_checkpoint, Checkpointer
+from neat.metrics import MetricsLogger
+from neat.islands import IslandModel
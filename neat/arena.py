@@ -0,0 +1,157 @@
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+from neat.genome import Genome, GENOME_TYPES
+
+# contiguous storage for every genome of a population
+# each genome owns a fixed size slot of a single preallocated float buffer,
+# where w1 and w2 are laid out back to back and zero padded to h_capacity
+# hidden units; entries past a genome's own h_dim are always kept at zero
+# so stacked views can be fed straight to neat.batch.predicts
+class GenomeArena:
+    def __init__(self, x_dim, y_dim, capacity, h_capacity=1):
+        self.x_dim = x_dim
+        self.y_dim = y_dim
+        self.capacity = capacity
+
+        self.h_dims = np.ones(capacity, dtype=np.int64)
+        self.types = np.zeros(capacity, dtype=np.int8)
+        self.scores = np.zeros(capacity, dtype=np.int64)
+        self.fitnesses = np.zeros(capacity)
+
+        self.allocate(h_capacity)
+        return
+
+    def allocate(self, h_capacity):
+        self.h_capacity = int(h_capacity)
+        # w1 is (h_capacity, x_dim + 1) and w2 is (y_dim, h_capacity)
+        self.w1_size = self.h_capacity * (self.x_dim + 1)
+        self.stride = self.w1_size + self.y_dim * self.h_capacity
+        self.buffer = np.zeros(self.capacity * self.stride)
+
+        # stacked views of all slots in the same layout as neat.batch
+        itemsize = self.buffer.itemsize
+        self.w1 = as_strided(
+            self.buffer,
+            shape=(self.capacity, self.h_capacity, self.x_dim + 1),
+            strides=(self.stride * itemsize, (self.x_dim + 1) * itemsize, itemsize)
+        )
+        self.w2 = as_strided(
+            self.buffer[self.w1_size:],
+            shape=(self.capacity, self.y_dim, self.h_capacity),
+            strides=(self.stride * itemsize, self.h_capacity * itemsize, itemsize)
+        )
+        return
+
+    # makes room for at least h_capacity hidden units,
+    # relaying out every slot only when the current capacity is exceeded
+    def reserve(self, h_capacity):
+        if h_capacity > self.h_capacity:
+            w1, w2 = self.w1, self.w2
+            old_capacity = self.h_capacity
+            self.allocate(max(h_capacity, old_capacity * 2))
+            self.w1[:, :old_capacity] = w1
+            self.w2[:, :, :old_capacity] = w2
+        return
+
+    # stacked weights of every genome, padded to the largest h_dim in use
+    def get_weights(self):
+        h_max = self.h_dims.max()
+        return self.w1[:, :h_max], self.w2[:, :, :h_max]
+
+    # overwrites every slot with stacked weights as produced by neat.evolver
+    def store(self, w1, w2, h_dims, types):
+        h_max = w1.shape[1]
+        self.reserve(h_max)
+        self.w1[:, :h_max] = w1
+        self.w1[:, h_max:] = 0
+        self.w2[:, :, :h_max] = w2
+        self.w2[:, :, h_max:] = 0
+        self.h_dims[:] = h_dims
+        self.types[:] = types
+        self.scores[:] = 0
+        self.fitnesses[:] = 0
+        return
+
+    def get_genome_nbytes(self):
+        return self.stride * self.buffer.itemsize + \
+            self.h_dims.itemsize + self.types.itemsize + \
+            self.scores.itemsize + self.fitnesses.itemsize
+
+# lightweight view of a single genome in an arena
+# with the same attributes as Genome
+class GenomeView:
+    __slots__ = ("arena", "index")
+
+    # fixed bias for simplicity
+    bias = 1
+
+    def __init__(self, arena, index):
+        self.arena = arena
+        self.index = index
+        return
+
+    @property
+    def x_dim(self):
+        return self.arena.x_dim
+
+    @property
+    def y_dim(self):
+        return self.arena.y_dim
+
+    @property
+    def h_dim(self):
+        return int(self.arena.h_dims[self.index])
+
+    @property
+    def genome_type(self):
+        return GENOME_TYPES[self.arena.types[self.index]]
+
+    @genome_type.setter
+    def genome_type(self, genome_type):
+        self.arena.types[self.index] = GENOME_TYPES.index(genome_type)
+
+    @property
+    def score(self):
+        return self.arena.scores[self.index]
+
+    @score.setter
+    def score(self, score):
+        self.arena.scores[self.index] = score
+
+    @property
+    def fitness(self):
+        return self.arena.fitnesses[self.index]
+
+    @fitness.setter
+    def fitness(self, fitness):
+        self.arena.fitnesses[self.index] = fitness
+
+    # assigning weights writes them into the slot,
+    # and the hidden size follows the shape of assigned weights
+    @property
+    def w1(self):
+        return self.arena.w1[self.index, :self.h_dim]
+
+    @w1.setter
+    def w1(self, w1):
+        h_dim = w1.shape[0]
+        self.arena.reserve(h_dim)
+        self.arena.w1[self.index, :h_dim] = w1
+        self.arena.w1[self.index, h_dim:] = 0
+        self.arena.h_dims[self.index] = h_dim
+
+    @property
+    def w2(self):
+        return self.arena.w2[self.index, :, :self.h_dim]
+
+    @w2.setter
+    def w2(self, w2):
+        h_dim = w2.shape[1]
+        self.arena.reserve(h_dim)
+        self.arena.w2[self.index, :, :h_dim] = w2
+        self.arena.w2[self.index, :, h_dim:] = 0
+        self.arena.h_dims[self.index] = h_dim
+
+    predict = Genome.predict
+    compile = Genome.compile
@@ -0,0 +1,25 @@
+import numpy as np
+
+# batched version of Genome.predict
+# w1 and w2 are stacked weights for n genomes and X is an (n, x_dim) array of
+# inputs, where the i-th row is fed to the i-th genome;
+# genomes may have different hidden sizes, but zero padding is harmless
+# since padded hidden units always output relu(0) = 0
+# and are connected to the output by zero weights
+def predicts(w1, w2, X, bias=1):
+    # append bias to inputs
+    x = np.empty((len(X), w1.shape[2], 1))
+    x[:, 0, 0] = bias
+    x[:, 1:, 0] = X
+
+    # multiply by weight and push to hidden layer
+    h = np.matmul(w1, x)
+
+    # apply relu activation to h
+    np.maximum(h, 0, out=h)
+
+    # multiply by weight and push to output
+    y = np.matmul(w2, h)
+
+    # return formatted output
+    return y[:, :, 0] > 0
@@ -0,0 +1,88 @@
+import os
+import random
+import numpy as np
+
+from neat.neat import Population
+
+# full population state is written as a flat npz archive of arrays,
+# so the arena buffer is saved and restored as a single block
+# without pickling individual genomes
+def save_checkpoint(population, path):
+    arena = population.arena
+    np_state = np.random.get_state()
+    py_state = random.getstate()
+    py_gauss = py_state[2] if py_state[2] is not None else np.nan
+
+    # write to a temporary file first so that a run killed mid write
+    # never leaves a broken checkpoint behind
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        np.savez(
+            f,
+            generation=population.generation,
+            num_input=population.num_input,
+            num_output=population.num_output,
+            pop_size=population.pop_size,
+            h_capacity=arena.h_capacity,
+            buffer=arena.buffer,
+            h_dims=arena.h_dims,
+            types=arena.types,
+            # genomes are saved before they are evaluated,
+            # so scores are those of the generation before them
+            scores=population.last_scores,
+            fitnesses=population.last_fitnesses,
+            np_rng_keys=np_state[1],
+            np_rng_pos=np_state[2],
+            np_rng_gauss=(np_state[3], np_state[4]),
+            py_rng_version=py_state[0],
+            py_rng_keys=np.array(py_state[1], dtype=np.int64),
+            py_rng_gauss=py_gauss,
+        )
+    os.replace(temp_path, path)
+    return
+
+# restores a population saved by save_checkpoint along with global rng states
+def load_checkpoint(path):
+    with np.load(path) as data:
+        population = Population(
+            int(data["num_input"]),
+            int(data["num_output"]),
+            pop_size=int(data["pop_size"])
+        )
+        population.generation = int(data["generation"])
+
+        arena = population.arena
+        arena.allocate(int(data["h_capacity"]))
+        arena.buffer[:] = data["buffer"]
+        arena.h_dims[:] = data["h_dims"]
+        arena.types[:] = data["types"]
+        population.last_scores[:] = data["scores"]
+        population.last_fitnesses[:] = data["fitnesses"]
+
+        has_gauss, cached_gauss = data["np_rng_gauss"]
+        np.random.set_state((
+            "MT19937",
+            data["np_rng_keys"],
+            int(data["np_rng_pos"]),
+            int(has_gauss),
+            float(cached_gauss)
+        ))
+        py_gauss = float(data["py_rng_gauss"])
+        random.setstate((
+            int(data["py_rng_version"]),
+            tuple(data["py_rng_keys"].tolist()),
+            None if np.isnan(py_gauss) else py_gauss
+        ))
+    return population
+
+# saves a checkpoint every given number of generations
+class Checkpointer:
+    def __init__(self, path, every=1):
+        self.path = path
+        self.every = every
+        return
+
+    def update(self, population):
+        if population.generation % self.every == 0:
+            save_checkpoint(population, self.path)
+        return
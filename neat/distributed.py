@@ -0,0 +1,280 @@
+import json
+import os
+import selectors
+import socket
+import struct
+import time
+from collections import deque
+import numpy as np
+
+# every message is a json header followed by a binary payload,
+# prefixed by the byte lengths of both
+PREFIX = struct.Struct("!II")
+# seconds a worker keeps trying to reach a coordinator that is not up yet
+CONNECT_TIMEOUT = 30
+# a shard running this many times longer than the median shard
+# of the same generation is handed to another worker as well
+SLOW_FACTOR = 4
+
+# addresses are either host:port for tcp or a path for unix sockets
+def parse_address(address):
+    if ":" in address and not address.startswith(("/", ".")):
+        host, port = address.rsplit(":", 1)
+        return socket.AF_INET, (host or "0.0.0.0", int(port))
+    else:
+        return socket.AF_UNIX, address
+
+def send_message(sock, header, payload=b""):
+    data = json.dumps(header, separators=(",", ":")).encode()
+    sock.sendall(PREFIX.pack(len(data), len(payload)) + data + payload)
+    return
+
+def recv_exactly(sock, size):
+    data = bytearray(size)
+    view = memoryview(data)
+    while view:
+        received = sock.recv_into(view)
+        if received == 0:
+            raise ConnectionError("connection closed")
+        view = view[received:]
+    return data
+
+def recv_message(sock):
+    header_size, payload_size = PREFIX.unpack(recv_exactly(sock, PREFIX.size))
+    header = json.loads(recv_exactly(sock, header_size))
+    payload = recv_exactly(sock, payload_size)
+    return header, payload
+
+# evaluates fitness of a population on worker processes connected over sockets,
+# possibly running on other hosts; workers are run with run_worker
+# shards of weights are sent as raw bytes along with either the seed
+# of the course or the course itself, and scores are sent back the same way;
+# shards of workers that disconnect or fall far behind the rest
+# are handed to other workers, and whichever result comes first is kept
+# config is handed to every worker as it connects, see run_worker
+class DistributedEvaluator:
+    def __init__(self, address, config=None, timeout=None):
+        self.family, self.address = parse_address(address)
+        self.config = config
+        # seconds after which a shard counts as lost regardless of other shards
+        self.timeout = timeout
+
+        if self.family == socket.AF_UNIX and os.path.exists(self.address):
+            os.unlink(self.address)
+        self.listener = socket.socket(self.family, socket.SOCK_STREAM)
+        if self.family == socket.AF_INET:
+            self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind(self.address)
+        self.listener.listen()
+
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.listener, selectors.EVENT_READ)
+        # task each connected worker is running, or None if it is idle
+        self.workers = {}
+        self.task_count = 0
+        return
+
+    def accept(self):
+        sock, _ = self.listener.accept()
+        if self.family == socket.AF_INET:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        send_message(sock, {"type": "config", "config": self.config})
+        self.selector.register(sock, selectors.EVENT_READ)
+        self.workers[sock] = None
+        return
+
+    def drop(self, sock):
+        self.selector.unregister(sock)
+        sock.close()
+        del self.workers[sock]
+        return
+
+    # course is an array of course data, which workers get as is,
+    # or an integer seed, which workers turn into a course on their own;
+    # deadline is a wall clock time and is sent as seconds remaining
+    def evaluate(self, population, course, deadline=None):
+        w1, w2 = population.get_weights()
+        # workers are sent a course array once per generation
+        course_sent = set()
+
+        # shards are cut by the number of workers, so wait for at least one
+        while not self.workers:
+            self.selector.select()
+            self.accept()
+
+        num_shards = max(len(self.workers), 1) * 4
+        bounds = np.linspace(0, len(w1), num_shards + 1, dtype=int)
+        shards = [
+            (start, stop)
+            for start, stop in zip(bounds[:-1], bounds[1:])
+            if start < stop
+        ]
+        pending = deque(range(len(shards)))
+        results = {}
+        # shard, start time and duration of every task sent this generation
+        tasks = {}
+        durations = []
+
+        def send_task(sock, shard):
+            start, stop = shards[shard]
+            self.task_count += 1
+            header = {
+                "type": "task",
+                "task": self.task_count,
+                "w1_shape": w1[start:stop].shape,
+                "w2_shape": w2[start:stop].shape,
+                "seconds": None if deadline is None else deadline - time.time(),
+            }
+            payload = [w1[start:stop].tobytes(), w2[start:stop].tobytes()]
+            if isinstance(course, np.ndarray):
+                if sock not in course_sent:
+                    header["course_shape"] = course.shape
+                    header["course_dtype"] = course.dtype.str
+                    payload.append(course.tobytes())
+                    course_sent.add(sock)
+            else:
+                header["seed"] = int(course)
+            send_message(sock, header, b"".join(payload))
+            tasks[self.task_count] = (shard, time.perf_counter())
+            self.workers[sock] = self.task_count
+            return
+
+        def lose(sock):
+            task = self.workers[sock]
+            if task in tasks and tasks[task][0] not in results:
+                pending.appendleft(tasks[task][0])
+            course_sent.discard(sock)
+            self.drop(sock)
+            return
+
+        while len(results) < len(shards):
+            # hand out pending shards to idle workers
+            for sock, task in list(self.workers.items()):
+                if not pending:
+                    break
+                if task is None:
+                    shard = pending.popleft()
+                    try:
+                        send_task(sock, shard)
+                    except OSError:
+                        pending.appendleft(shard)
+                        lose(sock)
+
+            for key, _ in self.selector.select(timeout=0.1):
+                if key.fileobj is self.listener:
+                    self.accept()
+                    continue
+                sock = key.fileobj
+                try:
+                    header, payload = recv_message(sock)
+                except (OSError, ConnectionError):
+                    lose(sock)
+                    continue
+                self.workers[sock] = None
+                # late results of earlier generations are thrown away
+                if header["task"] not in tasks:
+                    continue
+                shard, started = tasks[header["task"]]
+                if shard not in results:
+                    results[shard] = np.frombuffer(payload, dtype=np.int64)
+                    durations.append(time.perf_counter() - started)
+
+            # shards running for too long are handed out once more
+            now = time.perf_counter()
+            limit = self.timeout
+            if durations:
+                slow = SLOW_FACTOR * float(np.median(durations))
+                limit = slow if limit is None else min(limit, slow)
+            if limit is not None:
+                running = [
+                    tasks[task] for task in self.workers.values() if task in tasks
+                ]
+                for shard, started in running:
+                    if shard not in results and shard not in pending \
+                            and now - started > limit \
+                            and sum(s == shard for s, _ in running) == 1:
+                        pending.append(shard)
+
+        return np.concatenate([results[shard] for shard in range(len(shards))])
+
+    def close(self):
+        for sock in list(self.workers):
+            self.drop(sock)
+        self.selector.close()
+        self.listener.close()
+        if self.family == socket.AF_UNIX and os.path.exists(self.address):
+            os.unlink(self.address)
+        return
+
+def connect(address, timeout=CONNECT_TIMEOUT):
+    family, address = parse_address(address)
+    give_up = time.perf_counter() + timeout
+    while True:
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        try:
+            sock.connect(address)
+            break
+        except OSError:
+            sock.close()
+            if time.perf_counter() >= give_up:
+                raise
+            time.sleep(0.1)
+    if family == socket.AF_INET:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sock
+
+# runs shards sent by a DistributedEvaluator until it goes away
+# simulate(w1, w2, course, deadline) is the same as for ParallelEvaluator,
+# get_course(seed) returns the course array for a seed, and
+# configure(config) is called with the config of the evaluator
+def run_worker(address, simulate, get_course, configure=None):
+    sock = connect(address)
+    course = None
+    try:
+        while True:
+            try:
+                header, payload = recv_message(sock)
+            except ConnectionError:
+                break
+            if header["type"] == "config":
+                if configure is not None:
+                    configure(header["config"])
+                continue
+
+            w1 = np.frombuffer(payload, count=np.prod(header["w1_shape"]))
+            w2 = np.frombuffer(
+                payload,
+                count=np.prod(header["w2_shape"]),
+                offset=w1.nbytes
+            )
+            if "seed" in header:
+                course = get_course(header["seed"])
+            elif "course_shape" in header:
+                course = np.frombuffer(
+                    payload,
+                    dtype=header["course_dtype"],
+                    offset=w1.nbytes + w2.nbytes
+                ).reshape(header["course_shape"])
+                course.flags.writeable = False
+            deadline = None
+            if header["seconds"] is not None:
+                deadline = time.time() + header["seconds"]
+
+            scores = simulate(
+                w1.reshape(header["w1_shape"]),
+                w2.reshape(header["w2_shape"]),
+                course,
+                deadline
+            )
+            # the coordinator may be gone by the time a shard is done
+            try:
+                send_message(
+                    sock,
+                    {"type": "result", "task": header["task"]},
+                    np.asarray(scores, dtype=np.int64).tobytes()
+                )
+            except ConnectionError:
+                break
+    finally:
+        sock.close()
+    return
@@ -1,145 +1,130 @@
-import copy
 import numpy as np
 
-from neat.genome import Genome
-
 # list of constants for convenience
 MUTATE_RATE = 0.1
 DIVERGE_STRENGTH = 0.1
+BREED_MIX_RATE = 0.5
 # this is to prevent getting stuck in local minima
-mutate_strength_rule = lambda: np.random.choice(
-    [0.1, 0.2, 0.3, 0.4],
-    p=[0.4, 0.3, 0.2, 0.1]
-)
-
-def get_survived(genomes, n):
-    survived = [
-        copy.deepcopy(genome)
-        for genome in genomes[:n]
-    ]
-    for genome in survived:
-        genome.genome_type = "survived"
-    return survived
-
-def get_mutated(genomes, n):
-    p = [genome.fitness for genome in genomes]
-    mutated = np.random.choice(
-        genomes,
-        size=n,
-        replace=True,
-        p=p
-    )
-    mutated = [_mutate(genome) for genome in mutated]
-    return mutated
-
-def get_bred(genomes, n):
-    p = [genome.fitness for genome in genomes]
-    # additional layer of logic is required to
-    # avoid self breeding
-    get_parents = lambda: np.random.choice(
-        genomes,
-        size=2,
-        replace=False,
-        p=p
-    )
-    pairs_of_parents = [get_parents() for _ in range(n)]
-    bred = [_breed(parents) for parents in pairs_of_parents]
-    return bred
-
-def get_diverged(genomes, n):
-    p = [genome.fitness for genome in genomes]
-    diverged = np.random.choice(
-        genomes,
-        size=n,
-        replace=True,
-        p=p
+MUTATE_STRENGTHS = [0.1, 0.2, 0.3, 0.4]
+MUTATE_STRENGTH_P = [0.4, 0.3, 0.2, 0.1]
+
+# every operator below works on a whole generation at once
+# genomes are given as stacked weights w1 and w2 zero padded to
+# a common hidden size, together with an array of their actual hidden sizes
+# see neat.arena.GenomeArena for the layout
+
+# indices of genomes selected with probability p, with replacement
+def select(p, n):
+    return np.random.choice(len(p), size=n, replace=True, p=p)
+
+# pairs of distinct parents, each drawn with probability p
+def select_pairs(p, n):
+    if np.count_nonzero(p) < 2:
+        raise ValueError("at least two genomes with nonzero fitness are required")
+    first = select(p, n)
+    second = select_others(p, first)
+    return first, second
+
+# indices drawn with probability p, with the mass of exclude[i] taken out
+# for the i-th draw, so that no draw ever lands on its excluded genome;
+# drawing in a single step instead of redrawing collisions keeps this fast
+# even once a single genome holds almost all of the fitness
+def select_others(p, exclude):
+    cdf = np.cumsum(p)
+    cdf /= cdf[-1]
+    high = cdf[exclude]
+    low = np.where(exclude > 0, cdf[exclude - 1], 0.0)
+    width = high - low
+    others = np.empty_like(exclude)
+    # floating point rounding may still land a draw on the edge
+    # of its excluded genome, in which case only that draw is repeated
+    left = np.arange(len(exclude))
+    while len(left) > 0:
+        u = np.random.random(len(left)) * (1 - width[left])
+        u = np.where(u >= low[left], u + width[left], u)
+        others[left] = np.minimum(np.searchsorted(cdf, u, side="right"), len(p) - 1)
+        left = left[others[left] == exclude[left]]
+    return others
+
+# masks of entries that are in use for each genome
+def get_masks(w1, w2, h_dims):
+    hidden = np.arange(w1.shape[1])[None, :] < h_dims[:, None]
+    return hidden[:, :, None], hidden[:, None, :]
+
+def get_survived(w1, w2, h_dims, n):
+    # genomes are expected to be sorted by fitness already
+    return w1[:n].copy(), w2[:n].copy(), h_dims[:n].copy()
+
+def get_mutated(w1, w2, h_dims, p, n):
+    idx = select(p, n)
+    w1, w2, h_dims = w1[idx], w2[idx], h_dims[idx]
+    mask1, mask2 = get_masks(w1, w2, h_dims)
+
+    # strengths of negative and positive changes are drawn
+    # separately for each matrix of each genome
+    strengths = np.random.choice(
+        MUTATE_STRENGTHS,
+        size=(n, 4),
+        p=MUTATE_STRENGTH_P
     )
-    diverged = [_diverge(genome) for genome in diverged]
-    return diverged
+    w1 += _get_deltas(w1.shape, strengths[:, 0], strengths[:, 1]) * mask1
+    w2 += _get_deltas(w2.shape, strengths[:, 2], strengths[:, 3]) * mask2
+    return w1, w2, h_dims
 
-# copies a genome and returns a mutated one
-def _mutate(genome):
-    mutated = copy.deepcopy(genome)
-
-    prob = MUTATE_RATE / 2
-    w_delta = lambda w: np.random.choice(
-        [-mutate_strength_rule(), 0, mutate_strength_rule()],
-        size=w.shape,
-        p=[prob, 1 - (2 * prob), prob]
-    )
-    mutated.w1 += w_delta(mutated.w1)
-    mutated.w2 += w_delta(mutated.w2)
-
-    mutated.genome_type = "mutated"
-    return mutated
-
-def _breed(parents):
-    # create a new child with topology size at least as big as either parents
-    child = Genome(parents[0].x_dim, parents[0].y_dim, random_weights=False)
-    child.h_dim = max(parents[0].h_dim, parents[1].h_dim)
+def get_bred(w1, w2, h_dims, p, n):
+    first, second = select_pairs(p, n)
 
+    # create new children with topology size at least as big as either parents
     # if both parents have h_dim = 1, then randomly mix weights
-    # otherwise, breed them by crossover
-    if parents[0].h_dim == 1 and parents[1].h_dim == 1:
-        w1 = mix_weights(parents[0].w1, parents[1].w1)
-        w2 = mix_weights(parents[0].w2, parents[1].w2)
-    else:
-        if parents[0].h_dim < parents[1].h_dim:
-            small_genome = parents[0]
-            large_genome = parents[1]
-        else:
-            small_genome = parents[1]
-            large_genome = parents[0]
-        slice_idx = np.random.randint(1, small_genome.h_dim + 1)
-        w1 = np.vstack([small_genome.w1[:slice_idx], large_genome.w1[slice_idx:]])
-        w2 = np.hstack([small_genome.w2[:, :slice_idx], large_genome.w2[:, slice_idx:]])
-
-    child.w1 = w1
-    child.w2 = w2
-
-    child.genome_type = "bred"
-    return child
-
-def _diverge(genome):
-    diverged = copy.deepcopy(genome)
-    diverged.w1 = np.append(
-        diverged.w1,
-        (np.random.random((1, genome.x_dim + 1)) - 0.5) * DIVERGE_STRENGTH,
-        axis=0
-        )
-    diverged.w2 = np.append(
-        diverged.w2,
-        (np.random.random((genome.y_dim, 1)) - 0.5) * DIVERGE_STRENGTH,
-        axis=1
+    # otherwise, breed them by crossover where hidden units
+    # up to a random point come from the smaller parent
+    mixed = (h_dims[first] == 1) & (h_dims[second] == 1)
+    swap = h_dims[first] >= h_dims[second]
+    small = np.where(swap, second, first)
+    large = np.where(swap, first, second)
+    slice_idx = 1 + np.floor(
+        np.random.random(n) * h_dims[small]
+    ).astype(int)
+
+    hidden = np.arange(w1.shape[1])
+    crossover = hidden[None, :] < slice_idx[:, None]
+    mask1 = np.where(
+        mixed[:, None, None],
+        np.random.random((n,) + w1.shape[1:]) < BREED_MIX_RATE,
+        crossover[:, :, None]
+    )
+    mask2 = np.where(
+        mixed[:, None, None],
+        np.random.random((n,) + w2.shape[1:]) < BREED_MIX_RATE,
+        crossover[:, None, :]
     )
-    diverged.h_dim += 1
-
-    diverged.genome_type = "diverged"
-    return diverged
-
-# takes two numpy arrays and produces a child by breeding
-# either the number of rows or the number of columns of two matrices
-# should be the same.
-def mix_weights(w1, w2):
-    prob = 0.5
-
-    min_shape = min(w1.shape, w2.shape)
-    max_shape = max(w1.shape, w2.shape)
-
-    w1_pad = np.zeros(max_shape)
-    w2_pad = np.zeros(max_shape)
-    w1_pad[:w1.shape[0], :w1.shape[1]] = w1
-    w2_pad[:w2.shape[0], :w2.shape[1]] = w2
-    w = np.zeros(max_shape)
-
-    mask = np.random.choice([0, 1], size=min_shape, p=(1 - prob, prob))
-
-    min_shape_slice = np.index_exp[:min_shape[0], :min_shape[1]]
-    excess_row_slice = np.index_exp[min_shape[0]:, :]
-    excess_column_slice = np.index_exp[:, min_shape[1]:]
-
-    w[min_shape_slice] = w1_pad[min_shape_slice] * mask + w2_pad[min_shape_slice] * (1 - mask)
-    w[excess_row_slice] = w1_pad[excess_row_slice] + w2_pad[excess_row_slice]
-    w[excess_column_slice] = w1_pad[excess_column_slice] + w2_pad[excess_column_slice]
 
-    return np.copy(w)
+    # padded hidden units of the larger parent are zero,
+    # so children end up properly padded as well
+    w1 = np.where(mask1, w1[small], w1[large])
+    w2 = np.where(mask2, w2[small], w2[large])
+    h_dims = h_dims[large]
+    return w1, w2, h_dims
+
+# weights should have room for at least one more hidden unit
+def get_diverged(w1, w2, h_dims, p, n):
+    idx = select(p, n)
+    w1, w2, h_dims = w1[idx], w2[idx], h_dims[idx]
+
+    # add a new hidden unit with small random weights to each genome
+    rows = np.arange(n)
+    w1[rows, h_dims, :] = \
+        (np.random.random((n, w1.shape[2])) - 0.5) * DIVERGE_STRENGTH
+    w2[rows, :, h_dims] = \
+        (np.random.random((n, w2.shape[1])) - 0.5) * DIVERGE_STRENGTH
+    h_dims = h_dims + 1
+    return w1, w2, h_dims
+
+# each entry is decreased by neg or increased by pos
+# with probability MUTATE_RATE / 2 each, and is left alone otherwise
+def _get_deltas(shape, neg, pos):
+    prob = MUTATE_RATE / 2
+    r = np.random.random(shape)
+    neg = neg.reshape(-1, 1, 1)
+    pos = pos.reshape(-1, 1, 1)
+    return np.where(r < prob, -neg, 0) + np.where(r >= 1 - prob, pos, 0)
@@ -1,5 +1,10 @@
 import numpy as np
 
+from neat.policy import compile_policy
+
+# in the order children are laid out in each new generation
+GENOME_TYPES = ["survived", "mutated", "bred", "diverged"]
+
 class Genome:
     def __init__(self, x_dim, y_dim, random_weights=True):
         self.genome_type = "survived"
@@ -44,3 +49,8 @@ class Genome:
         # return formatted output
         y = np.ndarray.flatten(y > 0)
         return y
+
+    # specialized evaluator for watching a single genome,
+    # see neat.policy for details
+    def compile(self):
+        return compile_policy(self)
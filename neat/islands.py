@@ -0,0 +1,279 @@
+import multiprocessing as mp
+import queue
+import random
+import struct
+import time
+import numpy as np
+
+from neat.neat import Population
+
+# number of genomes, x_dim and y_dim of a packed batch of genomes
+HEADER = struct.Struct("!III")
+# seconds between checks on islands that might have died
+POLL_INTERVAL = 0.1
+
+# genomes are exchanged between islands as a small header followed by
+# hidden sizes, types and weights of every genome trimmed to its own
+# hidden size, so that neither padding nor pickled objects are ever sent
+def pack_genomes(arena, idx):
+    h_dims = arena.h_dims[idx]
+    parts = [
+        HEADER.pack(len(idx), arena.x_dim, arena.y_dim),
+        h_dims.astype(np.uint16).tobytes(),
+        arena.types[idx].astype(np.int8).tobytes(),
+    ]
+    for i, h_dim in zip(idx, h_dims.tolist()):
+        parts.append(arena.w1[i, :h_dim].tobytes())
+        parts.append(arena.w2[i, :, :h_dim].tobytes())
+    return b"".join(parts)
+
+# returns stacked weights padded to the largest hidden size,
+# along with hidden sizes and types, as laid out by neat.evolver
+def unpack_genomes(data):
+    count, x_dim, y_dim = HEADER.unpack_from(data)
+    offset = HEADER.size
+    h_dims = np.frombuffer(data, dtype=np.uint16, count=count, offset=offset)
+    offset += h_dims.nbytes
+    types = np.frombuffer(data, dtype=np.int8, count=count, offset=offset)
+    offset += types.nbytes
+
+    h_max = int(h_dims.max()) if count else 1
+    w1 = np.zeros((count, h_max, x_dim + 1))
+    w2 = np.zeros((count, y_dim, h_max))
+    for i, h_dim in enumerate(h_dims.tolist()):
+        w1[i, :h_dim] = np.frombuffer(
+            data,
+            count=h_dim * (x_dim + 1),
+            offset=offset
+        ).reshape(h_dim, x_dim + 1)
+        offset += w1[i, :h_dim].nbytes
+        w2[i, :, :h_dim] = np.frombuffer(
+            data,
+            count=y_dim * h_dim,
+            offset=offset
+        ).reshape(y_dim, h_dim)
+        offset += w2[i, :, :h_dim].nbytes
+    return w1, w2, h_dims.astype(np.int64), types.copy()
+
+# best scoring genomes of the generation that was just scored
+def emigrate(population, count):
+    order = np.argsort(-population.arena.scores, kind="stable")
+    return pack_genomes(population.arena, order[:count])
+
+# immigrants take the place of random children of a new generation,
+# sparing survivors so that an island never loses its own best genomes
+def immigrate(population, data):
+    w1, w2, h_dims, types = unpack_genomes(data)
+    arena = population.arena
+    slots = np.flatnonzero(arena.types != 0)
+    count = min(len(h_dims), len(slots))
+    if count == 0:
+        return
+    slots = np.random.choice(slots, count, replace=False)
+
+    h_max = w1.shape[1]
+    arena.reserve(h_max)
+    arena.w1[slots] = 0
+    arena.w2[slots] = 0
+    arena.w1[slots, :h_max] = w1[:count]
+    arena.w2[slots, :, :h_max] = w2[:count]
+    arena.h_dims[slots] = h_dims[:count]
+    arena.types[slots] = types[:count]
+    return
+
+# stand-in for neat.MetricsLogger on islands, which hands records
+# over to the process running the islands instead of writing them
+class ReportLogger:
+    def __init__(self, index, reports):
+        self.index = index
+        self.reports = reports
+        return
+
+    def write(self, record):
+        record["island"] = self.index
+        self.reports.put(("record", self.index, record))
+        return
+
+# evolves several populations at once, each in its own process and on its
+# own courses, and every so often sends the best genomes of each island
+# to the next one around a ring; islands never wait for each other,
+# so a migration is picked up whenever the receiving island gets to it
+# simulate(w1, w2, course, deadline) is the same as for ParallelEvaluator,
+# get_course(seed) returns the course array for a seed,
+# get_deadline(run_deadline) returns the wall clock deadline of a game, and
+# configure(config) is called with config on every island before it starts
+class IslandModel:
+    def __init__(
+        self,
+        num_islands,
+        simulate,
+        get_course,
+        get_deadline=None,
+        configure=None,
+        config=None,
+        migrate_every=10,
+        num_migrants=2,
+        seed=None
+    ):
+        self.num_islands = num_islands
+        self.simulate = simulate
+        self.get_course = get_course
+        self.get_deadline = get_deadline
+        self.configure = configure
+        self.config = config
+        self.migrate_every = migrate_every
+        self.num_migrants = num_migrants
+        # seed of every island's random number generators and courses
+        if seed is None:
+            seed = random.getrandbits(32)
+        self.seed = seed
+        return
+
+    # runs every island for the given number of generations or until
+    # the run deadline, and then leaves population with the last generation
+    # of the island whose last generation scored best;
+    # islands start from the given population if it has been evolved before,
+    # and from genomes of their own otherwise;
+    # every island flies the given course array if any, and courses
+    # of its own otherwise; report(record) is called for every
+    # generation of every island as it comes in
+    def run(
+        self,
+        population,
+        num_generations=None,
+        course=None,
+        run_deadline=None,
+        report=None
+    ):
+        context = mp.get_context()
+        inboxes = [context.Queue() for _ in range(self.num_islands)]
+        reports = context.Queue()
+        start = None
+        if population.generation > 1:
+            start = (
+                pack_genomes(population.arena, np.arange(population.pop_size)),
+                population.generation
+            )
+
+        islands = [
+            context.Process(
+                target=run_island,
+                args=(
+                    self,
+                    index,
+                    (population.num_input, population.num_output, population.pop_size),
+                    start,
+                    inboxes,
+                    reports,
+                    num_generations,
+                    course,
+                    run_deadline
+                ),
+                daemon=True
+            )
+            for index in range(self.num_islands)
+        ]
+        for island in islands:
+            island.start()
+
+        finals = {}
+        try:
+            while len(finals) < self.num_islands:
+                try:
+                    message = reports.get(timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    for index, island in enumerate(islands):
+                        if index not in finals and island.exitcode not in (None, 0):
+                            raise RuntimeError("island {} died".format(index))
+                    continue
+                if message[0] == "record":
+                    if report is not None:
+                        report(message[2])
+                else:
+                    _, index, data, generation, best_score = message
+                    finals[index] = (best_score, data, generation)
+        finally:
+            for island in islands:
+                if island.is_alive():
+                    island.terminate()
+                island.join()
+
+        # islands that never finished a generation have no best score
+        _, data, generation = max(
+            finals.values(),
+            key=lambda final: -1 if final[0] is None else final[0]
+        )
+        w1, w2, h_dims, types = unpack_genomes(data)
+        population.arena.store(w1, w2, h_dims, types)
+        population.generation = generation
+        return
+
+def run_island(
+    model,
+    index,
+    shape,
+    start,
+    inboxes,
+    reports,
+    num_generations,
+    course,
+    run_deadline
+):
+    if model.configure is not None:
+        model.configure(model.config)
+    # islands would otherwise all inherit the same random state
+    np_seed, py_seed, course_seed = \
+        np.random.SeedSequence([model.seed, index]).generate_state(3)
+    np.random.seed(np_seed)
+    random.seed(int(py_seed))
+    courses = np.random.default_rng(course_seed)
+
+    population = Population(*shape)
+    if start is not None:
+        data, population.generation = start
+        population.arena.store(*unpack_genomes(data))
+    population.metrics = ReportLogger(index, reports)
+
+    inbox = inboxes[index]
+    outbox = inboxes[(index + 1) % len(inboxes)]
+    # migrants left over for an island that already finished are dropped
+    # instead of keeping this island from exiting
+    outbox.cancel_join_thread()
+
+    count = 0
+    best_score = None
+    while num_generations is None or count < num_generations:
+        if run_deadline is not None and time.time() >= run_deadline:
+            break
+        offsets = course
+        if offsets is None:
+            offsets = model.get_course(int(courses.integers(1 << 32)))
+        deadline = run_deadline
+        if model.get_deadline is not None:
+            deadline = model.get_deadline(run_deadline)
+
+        w1, w2 = population.get_weights()
+        scores = model.simulate(w1, w2, offsets, deadline)
+        population.score_genomes(scores)
+        best_score = int(scores.max())
+        if population.generation % model.migrate_every == 0:
+            outbox.put(emigrate(population, model.num_migrants))
+        population.evolve_population()
+        count += 1
+
+        # take in whatever has arrived without waiting for anything
+        while True:
+            try:
+                immigrate(population, inbox.get_nowait())
+            except queue.Empty:
+                break
+
+    arena = population.arena
+    reports.put((
+        "final",
+        index,
+        pack_genomes(arena, np.arange(population.pop_size)),
+        population.generation,
+        best_score
+    ))
+    return
@@ -0,0 +1,66 @@
+import atexit
+import csv
+import json
+import os
+
+# columns that hold lists and are json encoded in csv files
+LIST_FIELDS = ["best_shape", "h_dims"]
+
+# writes one compact record per generation to a jsonl or csv file
+# the format is picked from the file extension, and writes are buffered;
+# echo prints a human readable summary of each record to stdout
+class MetricsLogger:
+    def __init__(self, path=None, echo=True, buffer_size=1 << 16):
+        self.path = path
+        self.echo = echo
+        self.file = None
+        self.writer = None
+
+        if self.path is not None:
+            self.csv = os.path.splitext(self.path)[1].lower() == ".csv"
+            self.file = open(self.path, "w", buffering=buffer_size, newline="")
+            atexit.register(self.close)
+        return
+
+    def write(self, record):
+        if self.file is not None:
+            if self.csv:
+                self.write_csv(record)
+            else:
+                self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        if self.echo:
+            print(self.format(record))
+        return
+
+    def write_csv(self, record):
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.file, fieldnames=list(record))
+            self.writer.writeheader()
+        record = dict(record)
+        for field in LIST_FIELDS:
+            if field in record:
+                record[field] = json.dumps(record[field])
+        self.writer.writerow(record)
+        return
+
+    def format(self, record):
+        return "\n".join([
+            "generation: {}".format(record["generation"]),
+            "best score: {}".format(record["best_score"]),
+            "best fitness: {:.4f}".format(record["best_fitness"]),
+            "best type: {}".format(record["best_type"]),
+            "best shape: {}, {}, {}".format(*record["best_shape"]),
+            "mean score: {:.1f}".format(record["mean_score"]),
+            "genome memory: {} bytes".format(record["genome_bytes"]),
+            "time: {:.3f}s evaluating, {:.3f}s evolving".format(
+                record["eval_time"],
+                record["evolve_time"]
+            ),
+            "----------------",
+        ])
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        return
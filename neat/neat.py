@@ -1,8 +1,11 @@
-import random
+import time
 import numpy as np
 
 import neat.evolver as evolver
-from neat.genome import Genome
+import neat.batch as batch
+from neat.genome import GENOME_TYPES
+from neat.arena import GenomeArena, GenomeView
+from neat.metrics import MetricsLogger
 
 POP_SIZE = 100
 SURVIVE_RATE = 0.2
@@ -26,61 +29,131 @@ class Population:
         self.num_diverge = int(self.pop_size * DIVERGE_RATE)
 
         # creation of initial gene pool
-        self.genomes = [
-            Genome(self.num_input, self.num_output) for _ in range(self.pop_size)
-        ]
+        # every genome lives in a single arena and genomes are views into it;
+        # views are bound to slots, so they always see the current generation
+        self.arena = GenomeArena(self.num_input, self.num_output, self.pop_size)
+        self.arena.w1[:] = np.random.random(self.arena.w1.shape) * 2 - 1
+        self.arena.w2[:] = np.random.random(self.arena.w2.shape) * 2 - 1
+        self.genomes = [GenomeView(self.arena, i) for i in range(self.pop_size)]
+        # scores and fitnesses of the last evaluated generation,
+        # kept since the arena clears them for every new generation
+        self.last_scores = np.zeros(self.pop_size, dtype=np.int64)
+        self.last_fitnesses = np.zeros(self.pop_size)
+
+        # optional neat.Checkpointer called after every generation
+        self.checkpoint = None
+        # sink for per generation records
+        self.metrics = MetricsLogger()
+        self.evolve_end = time.perf_counter()
 
         return
 
-    def predicts(self, X):
-        Y = [genome.predict(x) for genome, x in zip(self.genomes, X)]
-        return Y
+    # stacked weights of every genome for batched prediction
+    def get_weights(self):
+        return self.arena.get_weights()
+
+    # predicts outputs for a batch of inputs at once, where the i-th row of X
+    # is fed to the i-th genome or to genomes[idx[i]] if idx is given
+    def predicts(self, X, idx=None):
+        w1, w2 = self.get_weights()
+        if idx is not None:
+            w1 = w1[idx]
+            w2 = w2[idx]
+        return batch.predicts(w1, w2, np.asarray(X, dtype=float))
 
     def score_genomes(self, scores):
-        for genome, score in zip(self.genomes, scores):
-            genome.score = score
+        self.arena.scores[:] = scores
         # compute fitness scores that try to give more weight to later improvements
         # not sure if this is optimal
         scores = np.power(scores, np.log(self.generation + 1))
         # scores = np.power(scores, 2)
         total_score = scores.sum()
-        fitnesses = scores / total_score
-        for genome, fitness in zip(self.genomes, fitnesses):
-            genome.fitness = fitness
+        self.arena.fitnesses[:] = scores / total_score
 
         return
 
+    def get_record(self, best):
+        arena = self.arena
+        scores = arena.scores
+        p50, p90, p99 = np.percentile(scores, [50, 90, 99])
+        type_counts = np.bincount(arena.types, minlength=len(GENOME_TYPES))
+        record = {
+            "generation": self.generation,
+            "best_score": int(best.score),
+            "best_fitness": float(best.fitness),
+            "best_type": best.genome_type,
+            "best_shape": [best.x_dim, best.h_dim, best.y_dim],
+            "mean_score": float(scores.mean()),
+            "p50_score": float(p50),
+            "p90_score": float(p90),
+            "p99_score": float(p99),
+            # number of genomes with each hidden size, indexed by h_dim
+            "h_dims": np.bincount(arena.h_dims).tolist(),
+        }
+        for genome_type, count in zip(GENOME_TYPES, type_counts.tolist()):
+            record[genome_type] = count
+        record["genome_bytes"] = arena.get_genome_nbytes()
+        return record
+
     def evolve_population(self):
+        start = time.perf_counter()
+        arena = self.arena
         # sort genomes by its score
-        self.genomes.sort(key=lambda genome: genome.fitness, reverse=True)
+        order = np.argsort(-arena.fitnesses, kind="stable")
+        best = self.genomes[order[0]]
 
         # logging
-        print("generation: {}".format(self.generation))
-        print("best score: {}".format(self.genomes[0].score))
-        print("best fitness: {:.4f}".format(self.genomes[0].fitness))
-        print("best type: {}".format(self.genomes[0].genome_type))
-        print("best shape: {}, {}, {}".format(
-            self.genomes[0].x_dim,
-            self.genomes[0].h_dim,
-            self.genomes[0].y_dim
-        ))
-        print("----------------")
-
-        survived = evolver.get_survived(self.genomes, self.num_survive)
+        record = self.get_record(best)
+
         threshold = self.get_diverge_threshold(self.generation)
-        temp = [(genome.h_dim < threshold) for genome in self.genomes]
-        if all(temp):
-            mutated = evolver.get_mutated(self.genomes, self.num_mutate - self.num_diverge)
-            diverged = evolver.get_diverged(self.genomes, self.num_diverge)
+        if (arena.h_dims < threshold).all():
+            num_mutate = self.num_mutate - self.num_diverge
+            num_diverge = self.num_diverge
         else:
-            mutated = evolver.get_mutated(self.genomes, self.num_mutate)
-            diverged = []
-        bred = evolver.get_bred(self.genomes, self.num_breed)
+            num_mutate = self.num_mutate
+            num_diverge = 0
+
+        # reproduction is done for a whole generation at once on stacked weights
+        # leaving room for an extra hidden unit if any genome is to diverge
+        h_max = arena.h_dims.max() + int(num_diverge > 0)
+        arena.reserve(h_max)
+        w1 = arena.w1[order, :h_max]
+        w2 = arena.w2[order, :, :h_max]
+        h_dims = arena.h_dims[order]
+        p = arena.fitnesses[order]
+
+        children = [
+            evolver.get_survived(w1, w2, h_dims, self.num_survive),
+            evolver.get_mutated(w1, w2, h_dims, p, num_mutate),
+            evolver.get_bred(w1, w2, h_dims, p, self.num_breed),
+        ]
+        if num_diverge > 0:
+            children.append(evolver.get_diverged(w1, w2, h_dims, p, num_diverge))
+        types = np.repeat(
+            np.arange(len(children)),
+            [len(h_dims) for _, _, h_dims in children]
+        )
 
-        self.genomes = survived + mutated + bred + diverged
+        self.last_scores[:] = arena.scores
+        self.last_fitnesses[:] = arena.fitnesses
 
         # this is done for purely cosmetic purpose when rendering
-        random.shuffle(self.genomes)
+        order = np.random.permutation(len(types))
+        arena.store(
+            np.concatenate([w1 for w1, _, _ in children])[order],
+            np.concatenate([w2 for _, w2, _ in children])[order],
+            np.concatenate([h_dims for _, _, h_dims in children])[order],
+            types[order]
+        )
+
+        # evaluation is taken to be everything since the last generation
+        end = time.perf_counter()
+        record["eval_time"] = start - self.evolve_end
+        record["evolve_time"] = end - start
+        self.evolve_end = end
+        self.metrics.write(record)
 
         self.generation += 1
+        if self.checkpoint is not None:
+            self.checkpoint.update(self)
         return
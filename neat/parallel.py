@@ -0,0 +1,120 @@
+import multiprocessing as mp
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+
+# worker side state, set up once per worker process
+_simulate = None
+_block = None
+
+def _init_worker(simulate, configure, config):
+    global _simulate
+    _simulate = simulate
+    # workers started without fork inherit nothing from the coordinator
+    if configure is not None:
+        configure(config)
+    return
+
+def _open_block(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # before python 3.13 attached blocks are always tracked, which is
+        # harmless as long as workers share the coordinator's tracker
+        return shared_memory.SharedMemory(name=name)
+
+def _attach(name):
+    global _block
+    # keep the block attached between generations
+    # and only reattach when the coordinator allocates a new one
+    if _block is None or _block.name != name:
+        if _block is not None:
+            _block.close()
+        _block = _open_block(name)
+    return _block
+
+def _evaluate(task):
+    name, w1_shape, w2_shape, course_shape, course_dtype, start, stop, \
+        deadline = task
+    block = _attach(name)
+    w1 = np.ndarray(w1_shape, buffer=block.buf)
+    w2 = np.ndarray(w2_shape, buffer=block.buf, offset=w1.nbytes)
+    course = np.ndarray(
+        course_shape,
+        dtype=course_dtype,
+        buffer=block.buf,
+        offset=w1.nbytes + w2.nbytes
+    )
+    course.flags.writeable = False
+    return _simulate(w1[start:stop], w2[start:stop], course, deadline)
+
+# evaluates fitness of a population on a persistent pool of worker processes
+# simulate(w1, w2, course, deadline) should be a module level function that runs
+# a shard of stacked weights on the course given as an array and returns scores,
+# scoring balls still alive at the wall clock deadline, if any, as they are;
+# weights and the course are handed to workers through shared memory
+# instead of pickling genomes, and the course is shared read only;
+# configure(config) is called on every worker as it starts, see run_worker
+class ParallelEvaluator:
+    def __init__(self, simulate, num_workers=None, configure=None, config=None):
+        self.num_workers = num_workers or mp.cpu_count()
+        # workers started after the tracker share it, however they are started,
+        # so blocks are never unlinked behind the coordinator's back
+        resource_tracker.ensure_running()
+        self.pool = mp.Pool(
+            self.num_workers,
+            initializer=_init_worker,
+            initargs=(simulate, configure, config)
+        )
+        self.block = None
+        return
+
+    def get_block(self, size):
+        # grow the block only when weights no longer fit
+        if self.block is None or self.block.size < size:
+            self.free_block()
+            self.block = shared_memory.SharedMemory(create=True, size=size)
+        return self.block
+
+    def free_block(self):
+        if self.block is not None:
+            self.block.close()
+            self.block.unlink()
+            self.block = None
+        return
+
+    def evaluate(self, population, course, deadline=None):
+        w1, w2 = population.get_weights()
+        block = self.get_block(w1.nbytes + w2.nbytes + course.nbytes)
+        np.ndarray(w1.shape, buffer=block.buf)[:] = w1
+        np.ndarray(w2.shape, buffer=block.buf, offset=w1.nbytes)[:] = w2
+        np.ndarray(
+            course.shape,
+            dtype=course.dtype,
+            buffer=block.buf,
+            offset=w1.nbytes + w2.nbytes
+        )[:] = course
+
+        # a few shards per worker to even out uneven shard lengths
+        bounds = np.linspace(0, len(w1), self.num_workers * 4 + 1, dtype=int)
+        tasks = [
+            (
+                block.name,
+                w1.shape,
+                w2.shape,
+                course.shape,
+                course.dtype.str,
+                start,
+                stop,
+                deadline
+            )
+            for start, stop in zip(bounds[:-1], bounds[1:])
+            if start < stop
+        ]
+        scores = self.pool.map(_evaluate, tasks)
+        return np.concatenate(scores)
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+        self.free_block()
+        return
@@ -0,0 +1,66 @@
+import numpy as np
+
+# for networks this small, numpy dispatch costs more than the arithmetic,
+# so genomes with at most this many hidden units are compiled into
+# straight line python code; anything larger is evaluated by numpy
+# on preallocated buffers
+MAX_SCALAR_H_DIM = 8
+
+# compiled policies are snapshots of the weights at compile time,
+# and have to be compiled again once the genome changes;
+# they take the same inputs as Genome.predict and return a list of booleans,
+# with the same results up to floating point rounding
+def compile_policy(genome):
+    if genome.h_dim <= MAX_SCALAR_H_DIM:
+        return compile_scalar(genome.w1, genome.w2, genome.bias)
+    else:
+        return BufferedPolicy(genome.w1, genome.w2, genome.bias)
+
+# generates a function with every weight inlined as a constant
+# so that a call does nothing but float arithmetic on local variables
+def compile_scalar(w1, w2, bias=1):
+    h_dim, x_dim = w1.shape[0], w1.shape[1] - 1
+    y_dim = w2.shape[0]
+    xs = ["x{}".format(i) for i in range(x_dim)]
+    hs = ["h{}".format(j) for j in range(h_dim)]
+
+    lines = [
+        "def policy(x):",
+        "    if isinstance(x, ndarray):",
+        "        x = x.ravel().tolist()",
+        "    {}, = x".format(", ".join(xs)),
+    ]
+    # multiply by weight and push to hidden layer with relu activation
+    for j in range(h_dim):
+        terms = [repr(float(w1[j, 0] * bias))]
+        terms += ["{!r} * {}".format(float(w1[j, i + 1]), xs[i]) for i in range(x_dim)]
+        lines.append("    {} = {}".format(hs[j], " + ".join(terms)))
+        lines.append("    if {0} < 0.0: {0} = 0.0".format(hs[j]))
+    # multiply by weight and push to output
+    outputs = []
+    for k in range(y_dim):
+        terms = ["{!r} * {}".format(float(w2[k, j]), hs[j]) for j in range(h_dim)]
+        outputs.append("{} > 0.0".format(" + ".join(terms)))
+    lines.append("    return [{}]".format(", ".join(outputs)))
+
+    namespace = {"ndarray": np.ndarray}
+    exec("\n".join(lines), namespace)
+    return namespace["policy"]
+
+# evaluates a genome in place on buffers allocated once at compile time
+class BufferedPolicy:
+    def __init__(self, w1, w2, bias=1):
+        self.w1 = np.array(w1, dtype=float)
+        self.w2 = np.array(w2, dtype=float)
+        self.x = np.empty(self.w1.shape[1])
+        self.x[0] = bias
+        self.h = np.empty(self.w1.shape[0])
+        self.y = np.empty(self.w2.shape[0])
+        return
+
+    def __call__(self, x):
+        self.x[1:] = np.ravel(x)
+        np.dot(self.w1, self.x, out=self.h)
+        np.maximum(self.h, 0, out=self.h)
+        np.dot(self.w2, self.h, out=self.y)
+        return (self.y > 0).tolist()
@@ -1,25 +1,78 @@
+import argparse
+import os
+import numpy as np
+
 import neat
+import neat.batch as batch
 import lib
 
 from lib.settings import Settings
+from lib.environment import Environment
+from lib.course import Course, get_course
 from lib.constants import WIDTH, HEIGHT
 
 settings = Settings()
 
+# number of live balls up to which compiled policies beat batched prediction
+MAX_COMPILED_BALLS = 8
+
+# sensors map the environment to inputs for neural networks
+# each sensor is given the environment and indices of live balls,
+# and returns either a single value shared by every ball
+# or an array with one value per ball
+def ball_velocity(env, idx):
+    return env.states.velocity[idx] / 100
+
+def ball_height(env, idx):
+    return env.states.y[idx] / HEIGHT
+
+def wall_x(i):
+    def sensor(env, idx):
+        return env.walls[i].x / WIDTH
+    return sensor
+
+def wall_y(i):
+    def sensor(env, idx):
+        return env.walls[i].y / HEIGHT
+    return sensor
+
+SENSORS = [
+    ball_velocity,
+    ball_height,
+    wall_x(0),
+    wall_y(0),
+    wall_x(1),
+    wall_y(1),
+]
+
+# stacks outputs of sensors into an array of inputs with a row per live ball;
+# values shared by every ball are computed once and broadcast
+class Sensors:
+    def __init__(self, sensors=SENSORS):
+        self.sensors = sensors
+        self.num_input = len(self.sensors)
+        return
+
+    def get_x(self, env, idx):
+        X = np.empty((len(idx), self.num_input))
+        for i, sensor in enumerate(self.sensors):
+            X[:, i] = sensor(env, idx)
+        return X
+
 # game specific neat interface
 # this straps on to the original Core class
 # by inheriting it and overriding necessary methods
 # and adding extensions
 class NeatCore(lib.Core):
     # game specific variables
-    __num_input = 6
     __num_output = 1
 
     # overriden methods
-    def __init__(self):
-        super().__init__()
+    def __init__(self, headless=False, sensors=SENSORS, profiler=None):
+        super().__init__(headless=headless, profiler=profiler)
+        self.sensors = Sensors(sensors)
         self.population = neat.Population(
-            self.__num_input,
+            self.sensors.num_input,
             self.__num_output,
             pop_size=settings.num_balls
         )
@@ -28,61 +81,73 @@ class NeatCore(lib.Core):
     def new_balls(self):
         return [SmartBall(genome) for genome in self.population.genomes]
 
-    def update(self):
-        self.events.update()
-        settings.update(self.events)
-        # only cycle through balls alive in the environment for optimization
-        for ball in self.env.balls:
-            ball.think(self.get_x(ball, self.env.walls))
+    def step(self):
+        # only feed balls alive in the environment for optimization
+        # balls are created in the same order as genomes
+        # so ball indices can be used to look up genomes directly
+        idx = self.env.live
+        X = self.get_x(idx)
+        self.profiler.lap("sense")
+        # with only a few balls left, such as when watching the best genomes,
+        # each ball runs its compiled policy instead of one batched predict
+        if len(idx) <= MAX_COMPILED_BALLS:
+            for i, x in zip(idx.tolist(), X.tolist()):
+                self.balls[i].think(x)
+        else:
+            jumps = self.population.predicts(X, idx)[:, 0]
+            self.env.states.jump(idx[jumps])
+        self.profiler.lap("think")
         self.env.update(self.events)
+        self.profiler.lap("physics")
 
     def game_over(self):
         if self.env.game_over():
-            scores = [ball.score for ball in self.balls]
-            self.population.score_genomes(scores)
+            # genomes are saved with the game they played
+            w1, w2 = self.population.get_weights()
+            arena = self.population.arena
+            self.save_recording(
+                w1=w1,
+                w2=w2,
+                h_dims=arena.h_dims,
+                types=arena.types
+            )
+            self.population.score_genomes(self.env.states.score)
             self.population.evolve_population()
             return True
         else:
             return False
 
     def get_info_surface(self):
-        num_survived = sum([
-            ball.color == "blue" and ball.alive
-            for ball in self.env.balls
-        ])
-        num_mutated = sum([
-            ball.color == "green" and ball.alive
-            for ball in self.env.balls
-        ])
-        num_bred = sum([
-            ball.color == "yellow" and ball.alive
-            for ball in self.env.balls
-        ])
+        # live balls counted per color code, see lib.objects.COLORS
+        counts = np.bincount(
+            self.env.states.colors[self.env.live],
+            minlength=len(lib.objects.COLORS)
+        )
+        num_survived, num_mutated, num_bred = counts[:3]
 
         texts = [
             " Game: {}".format(self.game_count),
             " Score: {}".format(self.env.score),
             " Alive: {}".format(self.env.num_alive),
+            self.get_speed_text(),
             " (Blue) Survived: {}".format(num_survived),
             " (Green) Mutated: {}".format(num_mutated),
             " (Yellow) Bred: {}".format(num_bred)
         ]
+        if self.profiler.enabled:
+            texts += self.profiler.get_texts()
 
         return self.text_renderer.texts_to_surface(texts)
 
+    def get_recording_path(self):
+        return os.path.join(
+            self.record,
+            "generation_{:06d}.npz".format(self.population.generation)
+        )
+
     # extended methods
-    def get_x(self, ball, walls):
-        if ball.alive:
-            return [
-                ball.velocity / 100,
-                ball.y / HEIGHT,
-                walls[0].x / WIDTH,
-                walls[0].y / HEIGHT,
-                walls[1].x / WIDTH,
-                walls[1].y / HEIGHT
-            ]
-        else:
-            return [0] * self.__num_input
+    def get_x(self, idx):
+        return self.sensors.get_x(self.env, idx)
 
 class SmartBall(lib.objects.Ball):
     __genome_to_color = {
@@ -98,11 +163,53 @@ class SmartBall(lib.objects.Ball):
         # override randomized color
         self.genome = genome
         self.color = self.get_color(genome)
+        # compiled on first use, since most balls are fed in batches instead
+        self.policy = None
 
     def get_color(self, genome):
         return self.__genome_to_color[genome.genome_type]
     
     def think(self, x):
-        if self.genome.predict(x)[0]:
+        if self.policy is None:
+            self.policy = self.genome.compile()
+        if self.policy(x)[0]:
             self.jump()
         return
+
+# runs a shard of stacked weights headlessly on the course given by
+# an array of hole offsets until every ball dies or the game runs
+# out of budget, and returns scores;
+# used by worker processes for parallel evaluation
+def simulate(w1, w2, offsets, deadline=None, sensors=SENSORS):
+    sensors = Sensors(sensors)
+    balls = [lib.objects.Ball() for _ in range(len(w1))]
+    env = Environment(
+        balls,
+        headless=True,
+        course=Course(offsets),
+        deadline=deadline
+    )
+    while not env.game_over():
+        think(env, w1, w2, sensors)
+        env.update(None)
+    return env.states.score
+
+# feeds every live ball to its row of stacked weights and makes it jump
+def think(env, w1, w2, sensors):
+    idx = env.live
+    jumps = batch.predicts(w1[idx], w2[idx], sensors.get_x(env, idx))[:, 0]
+    env.states.jump(idx[jumps])
+    return
+
+# counterparts of simulate for neat.run_worker
+# workers are set up with the settings of the coordinator they connect to
+def configure(config):
+    Settings(argparse.Namespace(**config))
+    return
+
+def get_offsets(seed):
+    return get_course(seed).offsets
+
+# wall clock deadline of a game for neat.IslandModel
+def get_deadline(run_deadline=None):
+    return settings.get_deadline(run_deadline)
@@ -0,0 +1,32 @@
+import numpy as np
+
+from neat import evolver
+
+def get_p(scores, generation):
+    fitnesses = np.power(scores, np.log(generation + 1))
+    return fitnesses / fitnesses.sum()
+
+def test_select_pairs_distinct():
+    np.random.seed(0)
+    p = get_p(np.arange(1, 101, dtype=float), 10)
+    first, second = evolver.select_pairs(p, 1000)
+    assert (first != second).all()
+    assert (p[second] > 0).all()
+
+# a champion holding almost all of the fitness used to make
+# redrawing self breeding pairs run practically forever
+def test_select_pairs_dominant_genome():
+    np.random.seed(0)
+    scores = np.ones(100)
+    scores[0] = 200
+    p = get_p(scores, 100)
+    first, second = evolver.select_pairs(p, 40)
+    assert (first != second).all()
+    assert (second[first == 0] != 0).all()
+
+def test_select_others_distribution():
+    np.random.seed(0)
+    p = np.array([0.5, 0.2, 0.0, 0.3])
+    others = evolver.select_others(p, np.zeros(100000, dtype=np.int64))
+    freqs = np.bincount(others, minlength=len(p)) / len(others)
+    assert np.allclose(freqs, [0.0, 0.4, 0.0, 0.6], atol=0.01)